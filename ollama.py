@@ -6,6 +6,7 @@
 # Smooth Brain to avoid PR merge drift with other long-lived branches.
 
 from __future__ import annotations
+import hashlib
 import json
 import os
 import re
@@ -41,6 +42,17 @@ PREFERRED_MODELS = [
 
 _cached_model: Optional[str] = None
 
+# Refined-prompt memo, persisted so re-renders survive restarts.
+# Keyed by sha1 of (raw_prompt, model_id, purpose, guide text, Ollama model);
+# oldest entries drop first. Lives in the user cache dir, not next to the code.
+_REFINE_CACHE_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "smoothbrain", "refine.json",
+)
+_REFINE_CACHE_MAX = 256
+_refine_cache: Optional[Dict[str, str]] = None
+_refine_lock = threading.Lock()
+
 # ── Auto-setup state ─────────────────────────────────────────────────────────
 # Status values: "" (idle), "checking", "downloading", "installing",
 #                "starting", "pulling", "ready", "failed:<reason>"
@@ -582,6 +594,175 @@ def refine_single_prompt(
     return raw_prompt
 
 
+def _refine_cache_salt(model_id: str) -> str:
+    """Hash of what a refinement depends on besides the prompt: the model's
+    guide text and the Ollama model doing the rewrite. Editing a guide or
+    switching Ollama models changes every key, so stale entries just age out."""
+    guide = format_guide_for_system_prompt(model_id) or ""
+    return hashlib.sha1(f"{get_model_name() or ''}\0{guide}".encode("utf-8")).hexdigest()
+
+
+def _refine_cache_key(raw_prompt: str, model_id: str, purpose: str, salt: str) -> str:
+    return hashlib.sha1(json.dumps([raw_prompt, model_id, purpose, salt]).encode("utf-8")).hexdigest()
+
+
+def _load_refine_cache() -> Dict[str, str]:
+    """Return the in-memory refine cache, loading it from disk on first use."""
+    global _refine_cache
+    if _refine_cache is None:
+        _refine_cache = {}
+        try:
+            with open(_REFINE_CACHE_PATH, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                _refine_cache.update(data)
+        except FileNotFoundError:
+            pass
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"[smooth_brain/ollama] refine cache unreadable, starting fresh: {e}")
+    return _refine_cache
+
+
+def _save_refine_cache(cache: Dict[str, str]) -> None:
+    try:
+        os.makedirs(os.path.dirname(_REFINE_CACHE_PATH), exist_ok=True)
+        tmp = _REFINE_CACHE_PATH + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        os.replace(tmp, _REFINE_CACHE_PATH)
+    except OSError as e:
+        print(f"[smooth_brain/ollama] refine cache save failed: {e}")
+
+
+def refine_single_prompt_cached(
+    raw_prompt: str,
+    model_id: str,
+    purpose: str = "image",
+) -> str:
+    """refine_single_prompt, memoized in RAM and on disk.
+
+    Only successful refinements are stored — a raw-prompt fallback (Ollama
+    offline, no guide) is never cached, so it gets retried next time.
+    """
+    key = _refine_cache_key(raw_prompt, model_id, purpose, _refine_cache_salt(model_id))
+    with _refine_lock:
+        cache = _load_refine_cache()
+        hit = cache.pop(key, None)
+        if hit is not None:
+            cache[key] = hit  # move to most-recently-used end
+            return hit
+
+    refined = refine_single_prompt(raw_prompt, model_id, purpose=purpose)
+    if refined != raw_prompt:
+        with _refine_lock:
+            cache = _load_refine_cache()
+            cache[key] = refined
+            while len(cache) > _REFINE_CACHE_MAX:
+                cache.pop(next(iter(cache)))
+            _save_refine_cache(cache)
+    return refined
+
+
+def refine_batch_prompts(
+    raw_prompts: List[str],
+    model_id: str,
+    purpose: str = "video",
+) -> List[str]:
+    """Refine several prompts for the same model with one Ollama call.
+
+    Cached prompts are served from the refine cache; the rest go out as a
+    single numbered list and must come back as a JSON array of the same
+    length. If the batched reply is unusable, each missing prompt falls back
+    to refine_single_prompt_cached. Output order matches `raw_prompts`.
+    """
+    results: List[Optional[str]] = [None] * len(raw_prompts)
+    salt = _refine_cache_salt(model_id)
+    keys = [_refine_cache_key(p, model_id, purpose, salt) for p in raw_prompts]
+    with _refine_lock:
+        cache = _load_refine_cache()
+        for i, key in enumerate(keys):
+            hit = cache.pop(key, None)
+            if hit is not None:
+                cache[key] = hit  # move to most-recently-used end
+                results[i] = hit
+    missing = [i for i, r in enumerate(results) if r is None]
+    if not missing:
+        return results
+
+    guide_text = format_guide_for_system_prompt(model_id)
+    if not guide_text:
+        print(f"  [prompt] No guide for {model_id}, using raw prompts")
+        return [r if r is not None else raw_prompts[i] for i, r in enumerate(results)]
+    if not is_online() or not HAS_HTTPX:
+        print(f"  [prompt] Ollama offline — using raw prompts for {purpose}")
+        return [r if r is not None else raw_prompts[i] for i, r in enumerate(results)]
+    model_name = get_model_name()
+    if not model_name:
+        return [r if r is not None else raw_prompts[i] for i, r in enumerate(results)]
+
+    refined = None
+    if len(missing) > 1:
+        system = (
+            f"You are a prompt optimization specialist. Rewrite each prompt to follow "
+            f"the syntax, keywords, and rules of the target {purpose} model.\n"
+            f"\n{guide_text}\n\n"
+            f"You MUST respond with ONLY valid JSON — an array of exactly {len(missing)} strings, "
+            f"one refined prompt per input, in the same order.\n"
+            f"Rules:\n"
+            f"- ALWAYS include the main subject or character — never omit who or what is in the scene.\n"
+            f"- Preserve the original creative intent completely.\n"
+            f"- Apply model-specific syntax rules from the guide above.\n"
+            f"- Do NOT add new scene elements — only optimize the language.\n"
+            f"- Keep each refined prompt under 150 words."
+        )
+        prompt_list = "\n".join(f"{n+1}. {json.dumps(raw_prompts[i])}" for n, i in enumerate(missing))
+        try:
+            raw = _generate(
+                model_name, system,
+                f"Refine these {len(missing)} {purpose} prompts:\n\n{prompt_list}",
+                temperature=0.3, max_tokens=512 * len(missing),
+            )
+            refined = _extract_json_array(raw)
+            if not refined or len(refined) != len(missing) or not all(
+                isinstance(r, str) and len(r.strip()) > 10 for r in refined
+            ):
+                print(f"[smooth_brain/ollama] batch refinement returned "
+                      f"{len(refined) if refined else 0}/{len(missing)} usable items — refining one by one")
+                refined = None
+        except Exception as e:
+            print(f"[smooth_brain/ollama] batch refinement failed: {e} — refining one by one")
+            refined = None
+
+    if refined is None:
+        for i in missing:
+            results[i] = refine_single_prompt_cached(raw_prompts[i], model_id, purpose=purpose)
+        return results
+
+    print(f"  [prompt] Refined {len(missing)} {purpose} prompts in one call ({model_id})")
+    with _refine_lock:
+        cache = _load_refine_cache()
+        for i, text in zip(missing, refined):
+            results[i] = text.strip()
+            cache[keys[i]] = results[i]
+        while len(cache) > _REFINE_CACHE_MAX:
+            cache.pop(next(iter(cache)))
+        _save_refine_cache(cache)
+    return results
+
+
+def clear_refine_cache() -> None:
+    """Drop all memoized refinements, in memory and on disk."""
+    global _refine_cache
+    with _refine_lock:
+        _refine_cache = {}
+        try:
+            os.remove(_REFINE_CACHE_PATH)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"[smooth_brain/ollama] refine cache clear failed: {e}")
+
+
 def pack(
     concept: str = "",
     shot_count: int = 6,
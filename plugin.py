@@ -7,12 +7,15 @@
 # Step 4: Video Export     → GPU-aware duration slider + queue video renders
 
 from __future__ import annotations
+import concurrent.futures
 import copy
-import glob
 import importlib
 import os
+import random
+import sys
 import time
 import traceback
+import weakref
 from typing import Any, Dict, List, Optional
 
 import gradio as gr
@@ -20,7 +23,8 @@ from shared.utils.plugins import WAN2GPPlugin
 
 from .ollama import (
     pack as ollama_pack, get_status as ollama_status, is_online,
-    refine_single_prompt, describe_character_image,
+    refine_single_prompt, refine_single_prompt_cached, refine_batch_prompts,
+    describe_character_image,
     ensure_ollama_background, setup_status as ollama_setup_status,
 )
 from .state import (
@@ -67,6 +71,82 @@ STATUS_READY     = "ready"
 STATUS_APPROVED  = "approved"
 STATUS_REJECTED  = "rejected"
 
+# No-op component update. Built once via gr.update() so it always matches the
+# installed Gradio's update protocol; safe to share across output slots since
+# Gradio never mutates an update without a value.
+_NOOP_UPDATE = gr.update()
+
+# Shared RNG for re-roll seeds (avoids re-importing per reject click)
+_rng = random.Random()
+
+# Minimum seconds between unforced project saves during a render queue
+_SAVE_INTERVAL_S = 2.0
+# How long a project gallery scan stays fresh (renders invalidate it early)
+_GALLERY_TTL_S = 2.0
+# How often the export generator reports progress while a render runs
+_RENDER_POLL_S = 0.5
+
+# Render-queue status HTML. Constant messages are plain strings; parameterized
+# ones are bound `str.format` methods so each yield is a single format call.
+_HTML_NO_SHOTS = "<span style='color:red'>No shots to render</span>"
+_HTML_NO_IMAGE_MODEL = "<span style='color:orange'>⚠️ No image model. Set one in Step 1.</span>"
+_HTML_NO_PENDING_IMAGES = "<span style='color:orange'>No pending shots to generate.</span>"
+_HTML_NO_IMAGES = "<span style='color:red'>❌ No images generated. Check terminal for errors.</span>"
+_HTML_NO_SHOTS_FOUND = "<span style='color:red'>No shots found.</span>"
+_HTML_NO_VIDEO_MODEL = "<span style='color:red'>No video model selected.</span>"
+_HTML_NO_VIDEOS = "<span style='color:red'>❌ No videos generated. Check terminal for errors.</span>"
+_HTML_IMAGES_STARTING = "<span style='color:var(--primary-400)'>⏳ Rendering 0/{y} shots...</span>".format
+_HTML_IMAGES_STOPPED = "<span style='color:orange'>🛑 Render stopped. {x}/{y} shots completed.</span>".format
+_HTML_RENDERING_SHOT = (
+    "<span style='color:var(--primary-400)'>"
+    "🎨 <b>Rendering shot {n}</b> ({x}/{y})..."
+    "<br><small>Check terminal for live progress.</small></span>"
+).format
+_HTML_IMAGES_PROGRESS = "<span style='color:var(--primary-400)'>✅ {x}/{y} shots done...</span>".format
+_HTML_IMAGES_DONE = "<span style='color:var(--primary-500)'>✅ {x}/{y} shot image(s) generated!</span>".format
+_HTML_VIDEOS_STARTING = "<span style='color:var(--primary-400)'>⏳ Rendering 0/{y} videos...</span>".format
+_HTML_VIDEOS_STOPPED = "<span style='color:orange'>🛑 Render stopped. {x}/{y} videos completed.</span>".format
+_HTML_RENDERING_VIDEO = (
+    "<span style='color:var(--primary-400)'>"
+    "🎬 <b>Rendering shot {n}</b> ({x}/{y}) — {t}s elapsed..."
+    "<br><small>Check terminal for live progress.</small></span>"
+).format
+_HTML_VIDEOS_PROGRESS = "<span style='color:var(--primary-400)'>✅ {x}/{y} videos done...</span>".format
+_HTML_VIDEOS_DONE = "<span style='color:var(--primary-500)'>✅ {x}/{y} video(s) rendered!</span>".format
+
+
+def _cow_update_shot(sb_state: dict, idx: int, **fields) -> dict:
+    """Return a new state with shot `idx` updated by `fields`.
+    Only the state dict, the shots list and that one shot are copied —
+    every other shot dict is shared with the input state."""
+    shots = sb_state.get("shots", [])
+    if idx >= len(shots):
+        return sb_state
+    new_shots = shots[:]
+    new_shots[idx] = {**shots[idx], **fields}
+    return {**sb_state, "shots": new_shots}
+
+
+def _new_output_cursor(since_ts: float = 0.0) -> dict:
+    """Per-job cursor for _poll_new_outputs: files older than `since_ts` are ignored."""
+    return {"mtime": since_ts, "seen": set()}
+
+
+def _video_approved_count(sb_state: dict) -> int:
+    """Approved videos among the active shots.
+
+    Kept as a running counter in sb_state["video_approved_count"]; states
+    without it (older projects, or a changed shot_count) get it computed
+    once here and stored.
+    """
+    count = sb_state.get("video_approved_count")
+    if count is None:
+        shot_count = sb_state.get("shot_count", 6)
+        count = sum(1 for s in sb_state.get("shots", [])[:shot_count]
+                    if s.get("video_status") == STATUS_APPROVED)
+        sb_state["video_approved_count"] = count
+    return count
+
 
 class SmoothBrainPlugin(WAN2GPPlugin):
     def __init__(self):
@@ -77,6 +157,31 @@ class SmoothBrainPlugin(WAN2GPPlugin):
         self._image_models: List[dict] = []
         self._gpu_info: dict = {"name": "Unknown", "vram_mb": 0}
         self._render_cancelled = False
+        # Throttled project saves (see _maybe_save)
+        self._last_save_ts = 0.0
+        # video_model → {ltx, limits, gpu_note} for the duration slider
+        self._duration_ctx_cache: Dict[str, dict] = {}
+        # (project_dir, subfolder, extensions) → (scanned_at, files)
+        self._gallery_cache: Dict[tuple, tuple] = {}
+        self._last_render_ts = 0.0
+        # Badge / progress-bar HTML is a pure function of its args; both key
+        # spaces are tiny (MAX_SHOTS × statuses, approved × total)
+        self._badge_html_cache: Dict[tuple, str] = {}
+        self._progress_html_cache: Dict[tuple, str] = {}
+        # Video export tasks run here so the export generator can keep yielding
+        # progress; one worker keeps export tasks serial. Image renders don't
+        # use it — they run on their own generator thread. Created on first use
+        # (see _get_render_pool) and shut down by _reload_modules.
+        self._render_pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        # Hot-reloadable logic modules in dependency order (see _reload_modules).
+        # importlib.reload updates modules in place, so these handles stay valid.
+        from . import prompt_guides, story_templates, gpu_utils, model_scanner, state, ollama
+        self._reloadable = [
+            (mod.__name__.rsplit(".", 1)[-1], mod)
+            for mod in (prompt_guides, story_templates, gpu_utils, model_scanner, state, ollama)
+        ]
+        self._reloadable_by_name = dict(self._reloadable)
+        self._self_mod = sys.modules[__name__]
 
     # ── Plugin registration ──────────────────────────────────────────────────
 
@@ -123,6 +228,7 @@ class SmoothBrainPlugin(WAN2GPPlugin):
         self._video_models = self._video_models_simple  # default to Simple
         self._image_models = scan_image_models()
         self._gpu_info = get_gpu_info()
+        self._duration_ctx_cache = {}  # limits depend on the GPU just detected
 
         video_choices = [m["name"] for m in self._video_models]
         video_values = [m["id"] for m in self._video_models]
@@ -160,6 +266,9 @@ class SmoothBrainPlugin(WAN2GPPlugin):
             with gr.Column(visible=False) as self.step4_panel:
                 self._build_step4()
 
+            # Pre-built no-op row for storyboard yields that leave the images untouched
+            self._noop_imgs = [_NOOP_UPDATE] * len(self.sb_storyboard_panels)
+
             # ── Navigation ─────────────────────────────────────────────────
             with gr.Row():
                 self.sb_back_btn = gr.Button("← Back", visible=False, scale=0)
@@ -563,6 +672,19 @@ class SmoothBrainPlugin(WAN2GPPlugin):
                         "reject_btn": vid_reject_btn,
                     })
 
+        # Output lists are static once the cards exist — build them once
+        panels = self.sb_video_panels
+        self._vid_panel_outputs = tuple(x for p in panels for x in (p["group"], p["badge"], p["prompt_md"]))
+        self._vid_badge_outputs = tuple(p["badge"] for p in panels)
+        self._vid_button_outputs = tuple(x for p in panels for x in (p["approve_btn"], p["reject_btn"]))
+        self._vid_video_outputs = tuple(p["video"] for p in panels)
+        self._vid_prompt_outputs = tuple(p["prompt_md"] for p in panels)
+        # Per-session record of what the video cards currently show, so
+        # re-entering Step 4 only pushes cards that actually changed.
+        # Lives in gr.State (not on self) so a page reload or a second tab
+        # starts from an empty snapshot and gets a full refresh.
+        self.sb_vid_panel_snapshot = gr.State(None)
+
         # ── Project video gallery ──
         self.sb_video_gallery = gr.Gallery(
             label="📁 All Generated Videos",
@@ -618,8 +740,9 @@ class SmoothBrainPlugin(WAN2GPPlugin):
         # sb_step2_next is wired in _wire_step2 (combines save + navigate)
         self.sb_step3_next.click(
             fn=self._enter_step4,
-            inputs=[self.sb_state],
-            outputs=[*step_outputs, *self._all_vid_panel_outputs(), self.sb_video_gallery],
+            inputs=[self.sb_state, self.sb_vid_panel_snapshot],
+            outputs=[*step_outputs, *self._all_vid_panel_outputs(), self.sb_video_gallery,
+                     self.sb_vid_panel_snapshot],
         )
         self.sb_back_btn.click(fn=self._go_back, inputs=[self.sb_state], outputs=step_outputs)
 
@@ -705,6 +828,7 @@ class SmoothBrainPlugin(WAN2GPPlugin):
                 *self._storyboard_panel_outputs(),
                 *self._all_vid_panel_outputs(),
                 self.sb_video_gallery,
+                self.sb_vid_panel_snapshot,
             ],
         )
 
@@ -744,6 +868,8 @@ class SmoothBrainPlugin(WAN2GPPlugin):
         sb_state = dict(sb_state)
         if not sb_state.get("project_dir"):
             sb_state["project_dir"] = create_project_dir(concept)
+        if sb_state.get("shot_count") != int(shot_count):
+            sb_state.pop("video_approved_count", None)  # recounted on next use
         sb_state["concept"] = concept
         sb_state["shot_count"] = int(shot_count)
         sb_state["vibe"] = vibe
@@ -770,7 +896,7 @@ class SmoothBrainPlugin(WAN2GPPlugin):
                 project_dir = import_path
             else:
                 gr.Warning("Invalid folder path")
-                return [gr.update()] * 11  # sb_state + concept + shot_count + vibe + status + 6 step_outputs
+                return [_NOOP_UPDATE] * 11  # sb_state + concept + shot_count + vibe + status + 6 step_outputs
         else:
             # Find the matching project from dropdown
             if dropdown_selection and hasattr(self, '_recent_project_data'):
@@ -780,15 +906,16 @@ class SmoothBrainPlugin(WAN2GPPlugin):
                         project_dir = p["path"]
                         break
 
-        n_outputs = 15 + 11 * len(self.sb_storyboard_panels)
+        n_outputs = 16 + 11 * len(self.sb_storyboard_panels)
         if not project_dir:
             gr.Warning("No project selected")
-            return [gr.update()] * n_outputs
+            return [_NOOP_UPDATE] * n_outputs
 
         data = load_project(project_dir)
         if not data:
             gr.Warning("Could not load project")
-            return [gr.update()] * n_outputs
+            return [_NOOP_UPDATE] * n_outputs
+        _video_approved_count(data)  # migrate projects saved before the counter
 
         step = data.get("current_step", 1)
         step_vis = list(self._step_visibility(step))
@@ -815,11 +942,12 @@ class SmoothBrainPlugin(WAN2GPPlugin):
 
         # Restore video panels (Step 4)
         if step >= 4:
-            vid_panel_updates = self._make_video_panel_updates(data)
+            vid_panel_updates, panel_snapshot = self._make_video_panel_updates(data)
             vid_gallery = self._refresh_gallery(data, "videos", [".mp4"])
         else:
-            vid_panel_updates = [gr.update()] * (3 * len(self.sb_video_panels))
-            vid_gallery = gr.update()
+            vid_panel_updates = [_NOOP_UPDATE] * (3 * len(self.sb_video_panels))
+            vid_gallery = _NOOP_UPDATE
+            panel_snapshot = None  # cards untouched; next Step 4 entry refreshes fully
 
         return [
             data,                                    # sb_state
@@ -834,6 +962,7 @@ class SmoothBrainPlugin(WAN2GPPlugin):
             *panel_updates,                          # storyboard panels
             *vid_panel_updates,                      # video panels
             vid_gallery,                             # sb_video_gallery
+            panel_snapshot,                          # sb_vid_panel_snapshot
         ]
 
     def _do_roll(self, concept, shot_count, vibe, video_model, image_model, *genre_sliders):
@@ -1051,8 +1180,8 @@ class SmoothBrainPlugin(WAN2GPPlugin):
               f"refs={base.get('image_refs')!r} istart={base.get('image_start') is not None}")
         return {"id": task_id or int(time.time() * 1000), "params": base, "plugin_data": {}}
 
-    def _find_newest_output(self, extensions=None, since_ts=None, output_type="image"):
-        """Scan the wan2gp outputs directory for the newest matching file."""
+    def _output_dir(self, output_type="image"):
+        """Resolve the wan2gp outputs directory for images or videos."""
         cfg = self.server_config if hasattr(self, 'server_config') and self.server_config else {}
         if output_type == "image":
             out_dir = cfg.get("image_save_path", cfg.get("save_path", "outputs"))
@@ -1062,21 +1191,48 @@ class SmoothBrainPlugin(WAN2GPPlugin):
             # Resolve relative to wan2gp app directory
             wgp_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
             out_dir = os.path.join(wgp_dir, out_dir)
-        if not os.path.isdir(out_dir):
-            return None
+        return out_dir
+
+    def _poll_new_outputs(self, output_type="image", cursor=None, extensions=None):
+        """Output files written since the cursor was last advanced, oldest first.
+
+        `cursor` comes from _new_output_cursor and belongs to one render job, so
+        concurrent jobs never consume each other's files. It holds the newest
+        mtime returned so far plus the paths already returned at that mtime:
+        files are matched with `>=` so a sibling sharing a coarse timestamp is
+        still picked up, without returning the same path twice.
+        """
+        if cursor is None:
+            cursor = _new_output_cursor()
+        out_dir = self._output_dir(output_type)
         if extensions is None:
-            extensions = [".png", ".jpg", ".jpeg", ".webp"] if output_type == "image" else [".mp4"]
-        candidates = []
-        for ext in extensions:
-            candidates.extend(glob.glob(os.path.join(out_dir, f"*{ext}")))
-        if not candidates:
-            return None
-        # Filter by recent timestamp if specified
-        if since_ts:
-            candidates = [f for f in candidates if os.path.getmtime(f) >= since_ts]
-        if not candidates:
-            return None
-        return max(candidates, key=os.path.getmtime)
+            extensions = (".png", ".jpg", ".jpeg", ".webp") if output_type == "image" else (".mp4",)
+        extensions = tuple(extensions)
+        floor, seen = cursor["mtime"], cursor["seen"]
+        found = []
+        try:
+            with os.scandir(out_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith(extensions):
+                        continue
+                    try:
+                        mtime = entry.stat().st_mtime
+                    except OSError:
+                        continue
+                    if mtime >= floor and entry.path not in seen:
+                        found.append((mtime, entry.path))
+        except OSError:
+            return []
+        if not found:
+            return []
+        found.sort()
+        newest = found[-1][0]
+        if newest > floor:
+            cursor["mtime"] = newest
+            cursor["seen"] = {path for mtime, path in found if mtime == newest}
+        else:
+            seen.update(path for _, path in found)
+        return [path for _, path in found]
 
     def _run_render_tasks(self, tasks):
         """Run a list of render tasks in-process using process_tasks_cli.
@@ -1105,10 +1261,10 @@ class SmoothBrainPlugin(WAN2GPPlugin):
         image_model = sb_state.get("image_model", "")
         vibe = sb_state.get("vibe", "cinematic")
         if not description.strip():
-            yield "<span style='color:orange'>Enter a character description first.</span>", gr.update(visible=False), gr.update(), gr.update()
+            yield "<span style='color:orange'>Enter a character description first.</span>", gr.update(visible=False), _NOOP_UPDATE, _NOOP_UPDATE
             return
         if not image_model:
-            yield "<span style='color:orange'>⚠️ No image model. Set one in Step 1.</span>", gr.update(visible=False), gr.update(), gr.update()
+            yield _HTML_NO_IMAGE_MODEL, gr.update(visible=False), _NOOP_UPDATE, _NOOP_UPDATE
             return
         try:
             # Phase 1: Refine prompt — show stop button
@@ -1116,8 +1272,8 @@ class SmoothBrainPlugin(WAN2GPPlugin):
                 "<span style='color:var(--primary-400)'>"
                 "⏳ <b>Refining prompt</b> using model guide...</span>",
                 gr.update(visible=True),
-                gr.update(),
-                gr.update(),
+                _NOOP_UPDATE,
+                _NOOP_UPDATE,
             )
             refined = refine_single_prompt(description.strip(), image_model, purpose="image")
             print(f"[SmoothBrain] Character gen → model={image_model}")
@@ -1138,18 +1294,19 @@ class SmoothBrainPlugin(WAN2GPPlugin):
                 "🎨 <b>Generating image</b> — this may take a minute or two..."
                 "<br><small>Check terminal for live progress.</small></span>",
                 gr.update(visible=True),
-                gr.update(),
-                gr.update(),
+                _NOOP_UPDATE,
+                _NOOP_UPDATE,
             )
             success = self._run_render_tasks([task])
 
             if success:
-                output_path = self._find_newest_output(since_ts=before_ts, output_type="image")
+                new_files = self._poll_new_outputs("image", _new_output_cursor(before_ts))
+                output_path = new_files[-1] if new_files else None
                 if output_path:
                     # Copy to project folder
                     project_dir = sb_state.get("project_dir", "")
                     if project_dir:
-                        copy_to_project(output_path, project_dir, "characters")
+                        self._copy_to_project(output_path, project_dir, "characters")
                     char_gallery = self._refresh_gallery(sb_state, "characters")
                     yield (
                         "<span style='color:var(--primary-500)'>✅ Character image generated!</span>",
@@ -1161,19 +1318,19 @@ class SmoothBrainPlugin(WAN2GPPlugin):
                 yield (
                     "<span style='color:orange'>⚠️ Render finished but output file not found in outputs/.</span>",
                     gr.update(visible=False),
-                    gr.update(),
-                    gr.update(),
+                    _NOOP_UPDATE,
+                    _NOOP_UPDATE,
                 )
                 return
             yield (
                 "<span style='color:red'>❌ Render failed. Check terminal for details.</span>",
                 gr.update(visible=False),
-                gr.update(),
-                gr.update(),
+                _NOOP_UPDATE,
+                _NOOP_UPDATE,
             )
         except Exception as e:
             traceback.print_exc()
-            yield f"<span style='color:red'>Error: {e}</span>", gr.update(visible=False), gr.update(), gr.update()
+            yield f"<span style='color:red'>Error: {e}</span>", gr.update(visible=False), _NOOP_UPDATE, _NOOP_UPDATE
 
     def _save_characters_and_advance(self, state_dict, char_image):
         """Save character data, prefill concept, then navigate to Step 3."""
@@ -1291,8 +1448,9 @@ class SmoothBrainPlugin(WAN2GPPlugin):
         ]
         self.sb_skip_storyboard_btn.click(
             fn=self._enter_step4,
-            inputs=[self.sb_state],
-            outputs=[*step_outputs, *self._all_vid_panel_outputs(), self.sb_video_gallery],
+            inputs=[self.sb_state, self.sb_vid_panel_snapshot],
+            outputs=[*step_outputs, *self._all_vid_panel_outputs(), self.sb_video_gallery,
+                     self.sb_vid_panel_snapshot],
         )
 
     # ── Step 3 helpers ────────────────────────────────────────────────────────
@@ -1310,6 +1468,13 @@ class SmoothBrainPlugin(WAN2GPPlugin):
         return [p["img"] for p in self.sb_storyboard_panels]
 
     def _progress_bar_html(self, approved: int, total: int) -> str:
+        key = (approved, total)
+        html = self._progress_html_cache.get(key)
+        if html is None:
+            html = self._progress_html_cache[key] = self._render_progress_bar_html(approved, total)
+        return html
+
+    def _render_progress_bar_html(self, approved: int, total: int) -> str:
         pct = round((approved / total) * 100) if total > 0 else 0
         return (
             f"<div style='display:flex;align-items:center;gap:8px'>"
@@ -1320,6 +1485,13 @@ class SmoothBrainPlugin(WAN2GPPlugin):
         )
 
     def _shot_badge_html(self, index: int, status: str) -> str:
+        key = (index, status)
+        html = self._badge_html_cache.get(key)
+        if html is None:
+            html = self._badge_html_cache[key] = self._render_shot_badge_html(index, status)
+        return html
+
+    def _render_shot_badge_html(self, index: int, status: str) -> str:
         icons = {
             STATUS_PENDING:   "⏳",
             STATUS_RENDERING: "🎨",
@@ -1347,22 +1519,15 @@ class SmoothBrainPlugin(WAN2GPPlugin):
         shot_count = sb_state.get("shot_count", 6)
         approved = 0
 
-        badge_updates = []
-        button_updates = []
-        for i in range(MAX_SHOTS):
-            if i < shot_count and i < len(shots):
-                status = shots[i].get("status", STATUS_PENDING)
-                if status == STATUS_APPROVED:
-                    approved += 1
-                badge_updates.append(gr.update(value=self._shot_badge_html(i, status)))
-                show_buttons = status in (STATUS_READY, STATUS_APPROVED, STATUS_REJECTED)
-                button_updates.extend([
-                    gr.update(visible=show_buttons),
-                    gr.update(visible=show_buttons),
-                ])
-            else:
-                badge_updates.append(gr.update())
-                button_updates.extend([gr.update(), gr.update()])
+        badge_updates = [_NOOP_UPDATE] * MAX_SHOTS
+        button_updates = [_NOOP_UPDATE] * (2 * MAX_SHOTS)
+        for i in range(min(MAX_SHOTS, shot_count, len(shots))):
+            status = shots[i].get("status", STATUS_PENDING)
+            if status == STATUS_APPROVED:
+                approved += 1
+            badge_updates[i] = gr.update(value=self._shot_badge_html(i, status))
+            show_buttons = status in (STATUS_READY, STATUS_APPROVED, STATUS_REJECTED)
+            button_updates[2 * i] = button_updates[2 * i + 1] = gr.update(visible=show_buttons)
 
         all_have_images = shot_count > 0 and all(
             shots[i].get("ref_image_path") for i in range(shot_count) if i < len(shots)
@@ -1392,7 +1557,7 @@ class SmoothBrainPlugin(WAN2GPPlugin):
 
         def _yield_state(status_html: str, sb_state: dict, changed_shot: int = None, stop_btn_visible: bool = None, preserve_state: bool = False):
             """Build yield tuple for the generator, updating relevant outputs.
-            preserve_state=True → emit gr.update() for state slot so user approvals aren't overwritten.
+            preserve_state=True → emit a no-op update for state slot so user approvals aren't overwritten.
             """
             shots = sb_state.get("shots", [])
             shot_count = sb_state.get("shot_count", 0)
@@ -1407,56 +1572,45 @@ class SmoothBrainPlugin(WAN2GPPlugin):
             )
             next_btn = gr.update(interactive=all_have_images)
 
-            # Badges: always update all shots so none get stuck on a stale status
-            badges = []
-            for i in range(n_panels):
-                if i < len(shots):
-                    status = shots[i].get("status", STATUS_PENDING)
-                    badges.append(gr.update(value=self._shot_badge_html(i, status)))
-                else:
-                    badges.append(gr.update())
-
-            # Buttons: always update all shots
-            buttons = []
-            for i in range(n_panels):
-                if i < len(shots):
-                    status = shots[i].get("status", STATUS_PENDING)
-                    show = status in (STATUS_READY, STATUS_APPROVED, STATUS_REJECTED)
-                    buttons.extend([gr.update(visible=show), gr.update(visible=show)])
-                else:
-                    buttons.extend([gr.update(), gr.update()])
+            # Badges + buttons: always update all shots so none get stuck on a stale status
+            badges = [_NOOP_UPDATE] * n_panels
+            buttons = [_NOOP_UPDATE] * (2 * n_panels)
+            for i in range(min(n_panels, len(shots))):
+                status = shots[i].get("status", STATUS_PENDING)
+                badges[i] = gr.update(value=self._shot_badge_html(i, status))
+                show = status in (STATUS_READY, STATUS_APPROVED, STATUS_REJECTED)
+                buttons[2 * i] = buttons[2 * i + 1] = gr.update(visible=show)
 
             # Images: only push a new value when the changed shot has one (avoid flicker)
-            img_updates = []
-            for i in range(n_panels):
-                if changed_shot is not None and i == changed_shot:
-                    path = shots[i].get("ref_image_path") if i < len(shots) else None
-                    img_updates.append(gr.update(value=path) if path else gr.update())
-                else:
-                    img_updates.append(gr.update())
+            img_updates = self._noop_imgs
+            if changed_shot is not None and changed_shot < min(n_panels, len(shots)):
+                path = shots[changed_shot].get("ref_image_path")
+                if path:
+                    img_updates = list(img_updates)
+                    img_updates[changed_shot] = gr.update(value=path)
 
             gallery = self._refresh_gallery(sb_state, "images")
 
             # Stop render button visibility
-            stop_btn = gr.update(visible=stop_btn_visible) if stop_btn_visible is not None else gr.update()
+            stop_btn = gr.update(visible=stop_btn_visible) if stop_btn_visible is not None else _NOOP_UPDATE
 
-            # State: use gr.update() (no-op) on final yield to preserve user approvals
-            state_out = gr.update() if preserve_state else sb_state
+            # State: no-op update on final yield to preserve user approvals
+            state_out = _NOOP_UPDATE if preserve_state else sb_state
 
             return [
                 status_html,
                 state_out,
-                progress, next_btn, gr.update(),
+                progress, next_btn, _NOOP_UPDATE,
                 *badges, *buttons, *img_updates,
                 gallery,
                 stop_btn,
             ]
 
         if not shots:
-            yield _yield_state("<span style='color:red'>No shots to render</span>", sb_state, stop_btn_visible=False)
+            yield _yield_state(_HTML_NO_SHOTS, sb_state, stop_btn_visible=False)
             return
         if not image_model:
-            yield _yield_state("<span style='color:orange'>⚠️ No image model. Set one in Step 1.</span>", sb_state)
+            yield _yield_state(_HTML_NO_IMAGE_MODEL, sb_state)
             return
 
         # Identify shots to render
@@ -1470,7 +1624,7 @@ class SmoothBrainPlugin(WAN2GPPlugin):
                     to_render.append(i)
 
         if not to_render:
-            yield _yield_state("<span style='color:orange'>No pending shots to generate.</span>", sb_state)
+            yield _yield_state(_HTML_NO_PENDING_IMAGES, sb_state)
             return
 
         # Get character reference image
@@ -1483,15 +1637,16 @@ class SmoothBrainPlugin(WAN2GPPlugin):
 
         # Yield initial progress — show stop button
         yield _yield_state(
-            f"<span style='color:var(--primary-400)'>⏳ Rendering 0/{len(to_render)} shots...</span>",
+            _HTML_IMAGES_STARTING(y=len(to_render)),
             sb_state, stop_btn_visible=True,
         )
 
         for task_idx, shot_i in enumerate(to_render):
             # Check for cancellation
             if self._render_cancelled:
+                self._maybe_save(sb_state, force=True)
                 yield _yield_state(
-                    f"<span style='color:orange'>🛑 Render stopped. {rendered}/{len(to_render)} shots completed.</span>",
+                    _HTML_IMAGES_STOPPED(x=rendered, y=len(to_render)),
                     sb_state, stop_btn_visible=False,
                 )
                 return
@@ -1502,7 +1657,7 @@ class SmoothBrainPlugin(WAN2GPPlugin):
                 char_desc = sb_state.get("character_vision_description", "")
                 if char_desc:
                     raw_prompt = f"{char_desc}. {raw_prompt}"
-                prompt = refine_single_prompt(raw_prompt, image_model, purpose="image")
+                prompt = refine_single_prompt_cached(raw_prompt, image_model, purpose="image")
                 print(f"[SmoothBrain] Shot {shot_i+1} image → {prompt[:120]}")
 
                 extra = {
@@ -1527,9 +1682,7 @@ class SmoothBrainPlugin(WAN2GPPlugin):
 
                 # Yield rendering status
                 yield _yield_state(
-                    f"<span style='color:var(--primary-400)'>"
-                    f"🎨 <b>Rendering shot {shot_i+1}</b> ({task_idx+1}/{len(to_render)})..."
-                    f"<br><small>Check terminal for live progress.</small></span>",
+                    _HTML_RENDERING_SHOT(n=shot_i+1, x=task_idx+1, y=len(to_render)),
                     sb_state, changed_shot=shot_i,
                 )
 
@@ -1537,11 +1690,12 @@ class SmoothBrainPlugin(WAN2GPPlugin):
                 success = self._run_render_tasks([task])
 
                 if success:
-                    output_path = self._find_newest_output(since_ts=before_ts, output_type="image")
+                    new_files = self._poll_new_outputs("image", _new_output_cursor(before_ts))
+                    output_path = new_files[-1] if new_files else None
                     if output_path:
                         project_dir = sb_state.get("project_dir", "")
                         if project_dir:
-                            output_path = copy_to_project(output_path, project_dir, "images")
+                            output_path = self._copy_to_project(output_path, project_dir, "images")
                         s["ref_image_path"] = output_path
                         s["status"] = STATUS_APPROVED if is_auto else STATUS_READY
                         rendered += 1
@@ -1556,31 +1710,25 @@ class SmoothBrainPlugin(WAN2GPPlugin):
                 s["status"] = STATUS_PENDING
                 print(f"[SmoothBrain] ❌ Shot {shot_i+1} failed: {e}")
 
-            # Auto-save after each shot
-            save_project(sb_state)
+            # Auto-save after each shot (throttled; flushed when the queue ends)
+            self._maybe_save(sb_state)
 
             # Yield completed shot — only update this shot's badge/buttons/image
             yield _yield_state(
-                f"<span style='color:var(--primary-400)'>✅ {rendered}/{len(to_render)} shots done...</span>",
+                _HTML_IMAGES_PROGRESS(x=rendered, y=len(to_render)),
                 sb_state, changed_shot=shot_i,
             )
 
+        self._maybe_save(sb_state, force=True)
+
         # Final status (no shot changed — just update text)
-        if rendered > 0:
-            status = f"<span style='color:var(--primary-500)'>✅ {rendered}/{len(to_render)} shot image(s) generated!</span>"
-        else:
-            status = "<span style='color:red'>❌ No images generated. Check terminal for errors.</span>"
+        status = _HTML_IMAGES_DONE(x=rendered, y=len(to_render)) if rendered > 0 else _HTML_NO_IMAGES
         yield _yield_state(status, sb_state, stop_btn_visible=False, preserve_state=True)
 
 
     def _approve_shot(self, sb_state, shot_index):
-        sb_state = dict(sb_state)
-        shots = list(sb_state.get("shots", []))
-        if shot_index < len(shots):
-            shots[shot_index] = dict(shots[shot_index])
-            shots[shot_index]["status"] = STATUS_APPROVED
-        sb_state["shots"] = shots
-        save_project(sb_state)
+        sb_state = _cow_update_shot(sb_state, shot_index, status=STATUS_APPROVED)
+        self._maybe_save(sb_state, force=True)
         progress, next_btn, badges, buttons = self._build_status_updates(sb_state)
         return [sb_state, progress, next_btn, *badges, *buttons]
 
@@ -1591,26 +1739,16 @@ class SmoothBrainPlugin(WAN2GPPlugin):
         return gr.update(visible=False)
 
     def _reject_shot(self, sb_state, shot_index):
-        import random
-        sb_state = dict(sb_state)
-        shots = list(sb_state.get("shots", []))
-        if shot_index < len(shots):
-            shots[shot_index] = dict(shots[shot_index])
-            shots[shot_index]["status"] = STATUS_REJECTED
-            shots[shot_index]["seed"] = random.randint(0, 999999)
-        sb_state["shots"] = shots
-        save_project(sb_state)
+        sb_state = _cow_update_shot(
+            sb_state, shot_index, status=STATUS_REJECTED, seed=_rng.randrange(1_000_000),
+        )
+        self._maybe_save(sb_state, force=True)
         progress, next_btn, badges, buttons = self._build_status_updates(sb_state)
         return [sb_state, progress, next_btn, *badges, *buttons]
 
     def _update_shot_prompt(self, sb_state, shot_index, new_prompt):
         """Save user-edited prompt back to state."""
-        sb_state = dict(sb_state)
-        shots = list(sb_state.get("shots", []))
-        if shot_index < len(shots):
-            shots[shot_index] = dict(shots[shot_index])
-            shots[shot_index]["image_prompt"] = new_prompt
-        sb_state["shots"] = shots
+        sb_state = _cow_update_shot(sb_state, shot_index, image_prompt=new_prompt)
         return sb_state
 
     def _storyboard_panel_outputs(self):
@@ -1727,7 +1865,8 @@ class SmoothBrainPlugin(WAN2GPPlugin):
             inputs=[],
             outputs=[self.sb_state, self.step1_panel, self.step2_panel,
                      self.step3_panel, self.step4_panel,
-                     self.sb_back_btn, self.sb_step_label],
+                     self.sb_back_btn, self.sb_step_label,
+                     self.sb_vid_panel_snapshot],
         )
 
         # Dev reload
@@ -1737,41 +1876,64 @@ class SmoothBrainPlugin(WAN2GPPlugin):
             outputs=[self.sb_reload_status],
         )
 
+    def _get_duration_ctx(self, video_model: str) -> dict:
+        """Model-dependent parts of the duration hint, computed once per model."""
+        ctx = self._duration_ctx_cache.get(video_model)
+        if ctx is None:
+            ltx = is_ltx_model(video_model)
+            limits = smart_duration_limits(self._gpu_info["vram_mb"], ltx)
+            gpu_note = (
+                f" &nbsp;<span style='opacity:0.5'>({self._gpu_info['name']} · "
+                f"rec. ≤{limits['recommended']}s)</span>"
+                if self._gpu_info["vram_mb"] > 0 else ""
+            )
+            # Whole hint as one bound format per model; the GPU note is baked in
+            # (braces escaped) and non-LTX templates simply ignore {s}.
+            frames_note = " → {f} frames @ 24fps = {s}s" if ltx else " → {f} frames"
+            hint = ("<small>{d}s" + frames_note
+                    + gpu_note.replace("{", "{{").replace("}", "}}") + "</small>").format
+            ctx = {"ltx": ltx, "limits": limits, "gpu_note": gpu_note, "hint": hint}
+            self._duration_ctx_cache[video_model] = ctx
+        return ctx
+
     def _toggle_duration_mode(self, advanced: bool, sb_state: dict):
         """Toggle Simple ↔ Advanced, updating slider max based on GPU + model."""
         new_advanced = not advanced
-        video_model = sb_state.get("video_model", "")
-        ltx = is_ltx_model(video_model)
-        limits = smart_duration_limits(self._gpu_info["vram_mb"], ltx)
+        limits = self._get_duration_ctx(sb_state.get("video_model", ""))["limits"]
         new_max = limits["hard_max"] if new_advanced else limits["recommended"]
         label = "🔓 Advanced" if new_advanced else "🔒 Simple"
         return new_advanced, gr.update(value=label), gr.update(maximum=new_max)
 
     def _update_duration_hint(self, duration, sb_state):
-        video_model = sb_state.get("video_model", "")
-        ltx = is_ltx_model(video_model)
+        ctx = self._get_duration_ctx(sb_state.get("video_model", ""))
+        ltx = ctx["ltx"]
         frames = duration_to_frames(duration, fps=24, is_ltx=ltx)
-        actual_s = round(frames / 24, 2)
-        limits = smart_duration_limits(self._gpu_info["vram_mb"], ltx)
-        note = f" → {frames} frames @ 24fps = {actual_s}s" if ltx else f" → {frames} frames"
-        gpu_note = (
-            f" &nbsp;<span style='opacity:0.5'>({self._gpu_info['name']} · "
-            f"rec. ≤{limits['recommended']}s)</span>"
-            if self._gpu_info["vram_mb"] > 0 else ""
-        )
-        return f"<small>{duration}s{note}{gpu_note}</small>"
+        return ctx["hint"](d=duration, f=frames, s=round(frames / 24, 2))
 
     # ── Step 4 helpers ────────────────────────────────────────────────────────
 
+    def _copy_to_project(self, src_path, project_dir, subfolder):
+        """copy_to_project + mark galleries stale so the new file shows up."""
+        dest = copy_to_project(src_path, project_dir, subfolder)
+        self._last_render_ts = time.time()
+        return dest
+
     def _refresh_gallery(self, sb_state, subfolder, extensions=None):
-        """Return a gr.update for a gallery component with files from project subfolder."""
+        """Return a gr.update for a gallery component with files from project subfolder.
+        Scans are cached for _GALLERY_TTL_S, or until the next render lands."""
         project_dir = sb_state.get("project_dir", "") if isinstance(sb_state, dict) else ""
         if not project_dir:
             return gr.update(value=[])
+        key = (project_dir, subfolder, tuple(extensions or ()))
+        now = time.time()
+        cached = self._gallery_cache.get(key)
+        if cached and now - cached[0] < _GALLERY_TTL_S and cached[0] >= self._last_render_ts:
+            return gr.update(value=cached[1])
         files = scan_project_gallery(project_dir, subfolder, extensions)
+        self._gallery_cache[key] = (now, files)
         return gr.update(value=files)
 
-    def _enter_step4(self, sb_state):
+    def _enter_step4(self, sb_state, panel_snapshot=None):
         """Navigate to Step 4: auto-approve all READY shots, then populate video cards."""
         sb_state = dict(sb_state)
         shots = [dict(s) for s in sb_state.get("shots", [])]
@@ -1784,36 +1946,36 @@ class SmoothBrainPlugin(WAN2GPPlugin):
         sb_state["current_step"] = 4
         save_project(sb_state)
         step_updates = list(self._step_visibility(4))
-        panel_updates = self._make_video_panel_updates(sb_state)
+        panel_updates, panel_snapshot = self._make_video_panel_updates(sb_state, panel_snapshot)
         vid_gallery = self._refresh_gallery(sb_state, "videos", [".mp4"])
-        return [*step_updates, *panel_updates, vid_gallery]
+        return [*step_updates, *panel_updates, vid_gallery, panel_snapshot]
 
     def _all_vid_panel_outputs(self):
         """All outputs needed to populate video cards (group + badge + prompt)."""
-        out = []
-        for p in self.sb_video_panels:
-            out.extend([p["group"], p["badge"], p["prompt_md"]])
-        return out
+        return self._vid_panel_outputs
 
     def _all_vid_badge_outputs(self):
-        return [p["badge"] for p in self.sb_video_panels]
+        return self._vid_badge_outputs
 
     def _all_vid_button_outputs(self):
-        out = []
-        for p in self.sb_video_panels:
-            out.extend([p["approve_btn"], p["reject_btn"]])
-        return out
+        return self._vid_button_outputs
 
     def _all_vid_video_outputs(self):
-        return [p["video"] for p in self.sb_video_panels]
+        return self._vid_video_outputs
 
     def _all_vid_prompt_outputs(self):
-        return [p["prompt_md"] for p in self.sb_video_panels]
+        return self._vid_prompt_outputs
+
+    def _make_video_panel_updates(self, sb_state, snapshot=None):
+        """Build initial updates for video cards (visibility, prompts).
 
-    def _make_video_panel_updates(self, sb_state):
-        """Build initial updates for video cards (visibility, prompts)."""
+        Returns ``(updates, snapshot)``. Cards whose (visible, badge, prompt)
+        match the previous snapshot get no-op updates.
+        """
         shots = sb_state.get("shots", [])
         shot_count = sb_state.get("shot_count", 6)
+        n_panels = len(self.sb_video_panels)
+        snapshot = list(snapshot) if snapshot and len(snapshot) == n_panels else [None] * n_panels
         updates = []
         for i, panel in enumerate(self.sb_video_panels):
             visible = i < shot_count
@@ -1825,72 +1987,70 @@ class SmoothBrainPlugin(WAN2GPPlugin):
             else:
                 prompt_text = ""
                 vs = STATUS_PENDING
+            badge_html = self._shot_badge_html(i, vs)
+            key = (visible, badge_html, prompt_text)
+            if snapshot[i] == key:
+                updates.extend((_NOOP_UPDATE, _NOOP_UPDATE, _NOOP_UPDATE))
+                continue
+            snapshot[i] = key
             updates.extend([
                 gr.update(visible=visible),
-                gr.update(value=self._shot_badge_html(i, vs)),
+                gr.update(value=badge_html),
                 gr.update(value=prompt_text),
             ])
-        return updates
+        return updates, snapshot
 
-    def _approve_video_shot(self, sb_state, shot_index):
-        sb_state = dict(sb_state)
-        shots = list(sb_state.get("shots", []))
-        if shot_index < len(shots):
-            shots[shot_index] = dict(shots[shot_index])
-            shots[shot_index]["video_status"] = STATUS_APPROVED
-        sb_state["shots"] = shots
-        save_project(sb_state)
+    def _video_review_updates(self, sb_state, shot_index):
+        """Dict of updates for a single video card after approve/reject.
+        Components not in the dict are left untouched by Gradio."""
+        shots = sb_state.get("shots", [])
         shot_count = sb_state.get("shot_count", 6)
-        approved = sum(1 for s in shots[:shot_count]
-                       if s.get("video_status") == STATUS_APPROVED)
-        progress = self._progress_bar_html(approved, shot_count)
-        badges = []
-        for i in range(len(self.sb_video_panels)):
-            if i == shot_index:
-                vs = shots[i].get("video_status", STATUS_PENDING) if i < len(shots) else STATUS_PENDING
-                badges.append(gr.update(value=self._shot_badge_html(i, vs)))
-            else:
-                badges.append(gr.update())
-        buttons = []
-        for i in range(len(self.sb_video_panels)):
-            if i == shot_index:
-                buttons.extend([gr.update(visible=False), gr.update(visible=False)])
-            else:
-                buttons.extend([gr.update(), gr.update()])
-        return [sb_state, progress, *badges, *buttons]
+        approved = _video_approved_count(sb_state)
+        out = {
+            self.sb_state: sb_state,
+            self.sb_vid_progress_html: self._progress_bar_html(approved, shot_count),
+        }
+        if shot_index < len(self.sb_video_panels):
+            panel = self.sb_video_panels[shot_index]
+            vs = shots[shot_index].get("video_status", STATUS_PENDING) if shot_index < len(shots) else STATUS_PENDING
+            out[panel["badge"]] = gr.update(value=self._shot_badge_html(shot_index, vs))
+            out[panel["approve_btn"]] = gr.update(visible=False)
+            out[panel["reject_btn"]] = gr.update(visible=False)
+        return out
+
+    def _set_video_review(self, sb_state, shot_index, status):
+        """Copy-on-write video_status change that keeps the approved counter in step."""
+        shots = sb_state.get("shots", [])
+        if shot_index >= len(shots):
+            return sb_state
+        old = shots[shot_index].get("video_status", STATUS_PENDING)
+        approved = _video_approved_count(sb_state)
+        sb_state = _cow_update_shot(sb_state, shot_index, video_status=status)
+        if shot_index < sb_state.get("shot_count", 6):
+            sb_state["video_approved_count"] = (
+                approved + (status == STATUS_APPROVED) - (old == STATUS_APPROVED)
+            )
+        return sb_state
+
+    def _approve_video_shot(self, sb_state, shot_index):
+        sb_state = self._set_video_review(sb_state, shot_index, STATUS_APPROVED)
+        self._maybe_save(sb_state, force=True)
+        return self._video_review_updates(sb_state, shot_index)
 
     def _reject_video_shot(self, sb_state, shot_index):
-        sb_state = dict(sb_state)
-        shots = list(sb_state.get("shots", []))
-        if shot_index < len(shots):
-            shots[shot_index] = dict(shots[shot_index])
-            shots[shot_index]["video_status"] = STATUS_REJECTED
-        sb_state["shots"] = shots
-        save_project(sb_state)
-        shot_count = sb_state.get("shot_count", 6)
-        approved = sum(1 for s in shots[:shot_count]
-                       if s.get("video_status") == STATUS_APPROVED)
-        progress = self._progress_bar_html(approved, shot_count)
-        badges = []
-        for i in range(len(self.sb_video_panels)):
-            if i == shot_index:
-                vs = shots[i].get("video_status", STATUS_PENDING) if i < len(shots) else STATUS_PENDING
-                badges.append(gr.update(value=self._shot_badge_html(i, vs)))
-            else:
-                badges.append(gr.update())
-        buttons = []
-        for i in range(len(self.sb_video_panels)):
-            if i == shot_index:
-                buttons.extend([gr.update(visible=False), gr.update(visible=False)])
-            else:
-                buttons.extend([gr.update(), gr.update()])
-        return [sb_state, progress, *badges, *buttons]
+        sb_state = self._set_video_review(sb_state, shot_index, STATUS_REJECTED)
+        self._maybe_save(sb_state, force=True)
+        return self._video_review_updates(sb_state, shot_index)
 
     def _export_videos(self, wan2gp_state, sb_state, shot_duration):
-        """Generator: render video shots one at a time with per-card progress."""
+        """Generator: render video shots one task at a time with per-card progress.
+
+        Each task's output is attributed to its shot as soon as that task
+        finishes; the stop buttons are honoured between tasks."""
         sb_state = dict(sb_state)
         shots = [dict(s) for s in sb_state.get("shots", [])]
         sb_state["shots"] = shots
+        _video_approved_count(sb_state)  # counter must exist before statuses change below
         video_model = sb_state.get("video_model", "")
         vibe = sb_state.get("vibe", "cinematic")
         shot_count = sb_state.get("shot_count", 6)
@@ -1916,90 +2076,87 @@ class SmoothBrainPlugin(WAN2GPPlugin):
         V_APPROVED = STATUS_APPROVED
         V_REJECTED = STATUS_REJECTED
 
-        def _yield_state(status_html, sb_state, changed_shot=None, stop_btn_visible=None):
-            """Build output — only update specific shot's card."""
-            approved = sum(1 for s in shots[:shot_count]
-                           if s.get("video_status") == V_APPROVED)
-            progress = self._progress_bar_html(approved, shot_count)
-
-            badges = []
-            for i in range(n_panels):
-                if changed_shot is not None and i == changed_shot:
-                    vs = shots[i].get("video_status", V_PENDING) if i < len(shots) else V_PENDING
-                    badges.append(gr.update(value=self._shot_badge_html(i, vs)))
-                else:
-                    badges.append(gr.update())
-
-            buttons = []
-            for i in range(n_panels):
-                if changed_shot is not None and i == changed_shot:
-                    vs = shots[i].get("video_status", V_PENDING) if i < len(shots) else V_PENDING
-                    show = (vs == V_READY)
-                    buttons.extend([gr.update(visible=show), gr.update(visible=show)])
-                else:
-                    buttons.extend([gr.update(), gr.update()])
-
-            vid_updates = []
-            for i in range(n_panels):
-                if changed_shot is not None and i == changed_shot:
-                    path = shots[i].get("video_path") if i < len(shots) else None
-                    vid_updates.append(gr.update(value=path) if path else gr.update())
-                else:
-                    vid_updates.append(gr.update())
-
-            prompt_updates = [gr.update()] * n_panels
+        def _yield_state(status_html, sb_state, changed_shots=(), stop_btn_visible=None):
+            """Build output dict — only the listed shots' cards are touched."""
+            approved = _video_approved_count(sb_state)
+            out = {
+                self.sb_export_status: status_html,
+                self.sb_state: sb_state,
+                self.sb_vid_progress_html: self._progress_bar_html(approved, shot_count),
+            }
+            for i in changed_shots:
+                if i >= n_panels:
+                    continue
+                panel = self.sb_video_panels[i]
+                vs = shots[i].get("video_status", V_PENDING) if i < len(shots) else V_PENDING
+                show = (vs == V_READY)
+                out[panel["badge"]] = gr.update(value=self._shot_badge_html(i, vs))
+                out[panel["approve_btn"]] = gr.update(visible=show)
+                out[panel["reject_btn"]] = gr.update(visible=show)
+                path = shots[i].get("video_path") if i < len(shots) else None
+                if path:
+                    out[panel["video"]] = gr.update(value=path)
 
             # Stop button visibility
-            stop_top = gr.update(visible=stop_btn_visible) if stop_btn_visible is not None else gr.update()
-            stop_bot = gr.update(visible=stop_btn_visible) if stop_btn_visible is not None else gr.update()
-
-            return [
-                status_html,
-                sb_state, progress,
-                *badges, *buttons, *vid_updates, *prompt_updates,
-                stop_top, stop_bot,
-            ]
+            if stop_btn_visible is not None:
+                out[self.sb_stop_video_btn_top] = gr.update(visible=stop_btn_visible)
+                out[self.sb_stop_video_btn] = gr.update(visible=stop_btn_visible)
+            return out
 
         if not shots:
-            yield _yield_state("<span style='color:red'>No shots found.</span>", sb_state)
+            yield _yield_state(_HTML_NO_SHOTS_FOUND, sb_state)
             return
         if not video_model:
-            yield _yield_state("<span style='color:red'>No video model selected.</span>", sb_state)
+            yield _yield_state(_HTML_NO_VIDEO_MODEL, sb_state)
             return
 
+        # Loop-invariant per export: same model, vibe and resolution for every shot
+        res_str = VIDEO_RESOLUTION.get(vibe, {}).get(resolution, "832x480")
+        try:
+            defaults = self.get_default_settings(video_model)
+        except Exception:
+            defaults = {}
+
         # Identify shots to render (pending or rejected)
-        to_render = []
-        errors = []
+        pending = []
         for i, s in enumerate(shots[:shot_count]):
-            vs = s.get("video_status", V_PENDING)
-            if vs in (V_PENDING, V_REJECTED):
+            if s.get("video_status", V_PENDING) in (V_PENDING, V_REJECTED):
                 raw_prompt = s.get("video_prompt") or s.get("beat") or ""
                 if raw_prompt:
-                    prompt = refine_single_prompt(raw_prompt, video_model, purpose="video")
-                    try:
-                        shot_obj = ShotState(
-                            beat=s.get("beat", ""),
-                            image_prompt=s.get("image_prompt", ""),
-                            video_prompt=prompt,
-                            ref_image_path=s.get("ref_image_path"),
-                            seed=s.get("seed", -1),
-                        )
-                        try:
-                            defaults = self.get_default_settings(video_model)
-                        except Exception:
-                            defaults = {}
-                        params = build_video_params(shot_obj, video_model, shot_duration, vibe, defaults)
-                        res_str = VIDEO_RESOLUTION.get(vibe, {}).get(resolution, "832x480")
-                        params["resolution"] = res_str
-                        # Apply speed profile params (accelerator lora, step count, etc.)
-                        if profile_params:
-                            params.update(profile_params)
-                        ref_path = s.get("ref_image_path")
-                        if ref_path and os.path.exists(ref_path):
-                            params["image_start"] = ref_path
-                        to_render.append((i, prompt, params))
-                    except Exception as e:
-                        errors.append(f"Shot {i+1}: {e}")
+                    pending.append((i, raw_prompt))
+
+        # One Ollama round-trip for every pending prompt
+        refined = refine_batch_prompts([r for _, r in pending], video_model, purpose="video")
+        # Stat each distinct ref image once for the whole batch
+        existing_refs = {
+            p for p in {shots[i].get("ref_image_path") for i, _ in pending} if p and os.path.exists(p)
+        }
+
+        to_render = []
+        errors = []
+        for (i, _raw), prompt in zip(pending, refined):
+            s = shots[i]
+            try:
+                shot_obj = ShotState(
+                    beat=s.get("beat", ""),
+                    image_prompt=s.get("image_prompt", ""),
+                    video_prompt=prompt,
+                    ref_image_path=s.get("ref_image_path"),
+                    seed=s.get("seed", -1),
+                )
+                params = build_video_params(
+                    shot_obj, video_model, shot_duration, vibe, defaults, existing_refs,
+                )
+                params["resolution"] = res_str
+                # Apply speed profile params (accelerator lora, step count, etc.)
+                if profile_params:
+                    params.update(profile_params)
+                ref_path = s.get("ref_image_path")
+                if ref_path in existing_refs:
+                    params["image_start"] = ref_path
+                to_render.append((i, prompt, params))
+            except Exception as e:
+                errors.append(f"Shot {i+1}: {e}")
 
         if not to_render:
             err_msg = "; ".join(errors) if errors else "No pending shots"
@@ -2009,17 +2166,18 @@ class SmoothBrainPlugin(WAN2GPPlugin):
         rendered = 0
         self._render_cancelled = False
 
-        # Yield initial
-        yield _yield_state(
-            f"<span style='color:var(--primary-400)'>⏳ Rendering 0/{len(to_render)} videos...</span>",
-            sb_state, stop_btn_visible=True,
-        )
+        yield _yield_state(_HTML_VIDEOS_STARTING(y=len(to_render)), sb_state, stop_btn_visible=True)
 
+        project_dir = sb_state.get("project_dir", "")
+        # Output files already attached to a shot are never attached again
+        claimed = {p for p in (sh.get("video_path") for sh in shots) if p}
+        base_id = int(time.time() * 1000)
         for task_idx, (shot_i, prompt, params) in enumerate(to_render):
             # Check for cancellation
             if self._render_cancelled:
+                self._maybe_save(sb_state, force=True)
                 yield _yield_state(
-                    f"<span style='color:orange'>🛑 Render stopped. {rendered}/{len(to_render)} videos completed.</span>",
+                    _HTML_VIDEOS_STOPPED(x=rendered, y=len(to_render)),
                     sb_state, stop_btn_visible=False,
                 )
                 return
@@ -2028,94 +2186,114 @@ class SmoothBrainPlugin(WAN2GPPlugin):
             # Store the refined prompt for display
             s["video_prompt_used"] = prompt
             print(f"[SmoothBrain] Shot {shot_i+1} video → {prompt[:120]}")
+            task = self._build_task(prompt, video_model, params, task_id=base_id + task_idx)
 
             yield _yield_state(
-                f"<span style='color:var(--primary-400)'>"
-                f"🎬 <b>Rendering shot {shot_i+1}</b> ({task_idx+1}/{len(to_render)})..."
-                f"<br><small>Check terminal for live progress.</small></span>",
-                sb_state, changed_shot=shot_i,
+                _HTML_RENDERING_VIDEO(n=shot_i+1, x=task_idx+1, y=len(to_render), t=0),
+                sb_state, changed_shots=(shot_i,),
             )
 
-            task = self._build_task(prompt, video_model, params)
+            # Render off the generator thread so elapsed-time progress reaches
+            # the browser; outputs are only read once this task has finished
             before_ts = time.time()
-            try:
-                success = self._run_render_tasks([task])
-            except Exception as e:
-                traceback.print_exc()
-                success = False
+            out_cursor = _new_output_cursor(before_ts)
+            future = self._get_render_pool().submit(self._run_render_tasks, [task])
+            while True:
+                try:
+                    success = future.result(timeout=_RENDER_POLL_S)
+                    break
+                except concurrent.futures.TimeoutError:
+                    pass
+                except Exception:
+                    traceback.print_exc()
+                    success = False
+                    break
+                yield _yield_state(
+                    _HTML_RENDERING_VIDEO(
+                        n=shot_i+1, x=task_idx+1, y=len(to_render), t=int(time.time() - before_ts),
+                    ),
+                    sb_state,
+                )
 
-            if success:
-                output_path = self._find_newest_output(since_ts=before_ts, output_type="video")
-                if output_path:
-                    # Copy to project folder
-                    project_dir = sb_state.get("project_dir", "")
-                    if project_dir:
-                        output_path = copy_to_project(output_path, project_dir, "videos")
-                    s["video_path"] = output_path
-                    s["video_status"] = V_APPROVED  # Auto-approve for now
-                    rendered += 1
-                    print(f"  Shot {shot_i+1} → {output_path}")
-                else:
-                    s["video_status"] = V_PENDING
+            # This task's finished outputs only — newest wins if it wrote several
+            new_files = self._poll_new_outputs("video", out_cursor) if success else []
+            new_files = [p for p in new_files if p not in claimed]
+            output_path = new_files[-1] if new_files else None
+            if output_path:
+                claimed.add(output_path)
+                # Copy to project folder
+                if project_dir:
+                    output_path = self._copy_to_project(output_path, project_dir, "videos")
+                s["video_path"] = output_path
+                s["video_status"] = V_APPROVED  # Auto-approve for now
+                # Queued shots were pending/rejected, so each one is a new approval
+                sb_state["video_approved_count"] += 1
+                rendered += 1
+                print(f"  Shot {shot_i+1} → {output_path}")
             else:
                 s["video_status"] = V_PENDING
 
-            # Auto-save after each shot
-            save_project(sb_state)
+            # Auto-save after each shot (throttled; flushed when the queue ends)
+            self._maybe_save(sb_state)
 
             yield _yield_state(
-                f"<span style='color:var(--primary-400)'>✅ {rendered}/{len(to_render)} videos done...</span>",
-                sb_state, changed_shot=shot_i,
+                _HTML_VIDEOS_PROGRESS(x=rendered, y=len(to_render)),
+                sb_state, changed_shots=(shot_i,),
             )
 
-        if rendered > 0:
-            status = f"<span style='color:var(--primary-500)'>✅ {rendered}/{len(to_render)} video(s) rendered!</span>"
-        else:
-            status = "<span style='color:red'>❌ No videos generated. Check terminal for errors.</span>"
+        self._maybe_save(sb_state, force=True)
+
+        status = _HTML_VIDEOS_DONE(x=rendered, y=len(to_render)) if rendered > 0 else _HTML_NO_VIDEOS
         yield _yield_state(status, sb_state, stop_btn_visible=False)
 
     def _new_project(self):
         clear_session()
         state = self._default_state()
-        return [state, *self._step_visibility(1)]
+        return [state, *self._step_visibility(1), None]
+
+    def _get_render_pool(self) -> concurrent.futures.ThreadPoolExecutor:
+        pool = self._render_pool
+        if pool is None:
+            pool = self._render_pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="smoothbrain-render",
+            )
+            # Release the worker when the plugin itself is unloaded and collected
+            weakref.finalize(self, pool.shutdown, wait=False)
+        return pool
+
+    def _shutdown_render_pool(self) -> None:
+        """Stop the export worker; a task already running finishes, queued ones are dropped."""
+        pool, self._render_pool = self._render_pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
 
     def _reload_modules(self):
         """Hot-reload all Python logic modules (not UI layout)."""
         reloaded = []
         errors = []
-        # Modules to reload in dependency order
-        module_names = [
-            "plugins.smooth_brain.prompt_guides",
-            "plugins.smooth_brain.story_templates",
-            "plugins.smooth_brain.gpu_utils",
-            "plugins.smooth_brain.model_scanner",
-            "plugins.smooth_brain.state",
-            "plugins.smooth_brain.ollama",
-        ]
-        import sys
-        for mod_name in module_names:
-            if mod_name in sys.modules:
-                try:
-                    importlib.reload(sys.modules[mod_name])
-                    reloaded.append(mod_name.split(".")[-1])
-                except Exception as e:
-                    errors.append(f"{mod_name}: {e}")
+        self._shutdown_render_pool()
+        for short_name, mod in self._reloadable:
+            try:
+                importlib.reload(mod)
+                reloaded.append(short_name)
+            except Exception as e:
+                errors.append(f"{short_name}: {e}")
 
-        # Re-import updated symbols into this module's namespace
+        # Re-bind updated symbols into this module's namespace
         try:
-            from . import ollama as _ollama_mod
-            from . import state as _state_mod
-            from . import story_templates as _st_mod
-            from . import model_scanner as _ms_mod
-            from . import gpu_utils as _gpu_mod
-            # Update module-level refs used by plugin
-            import plugins.smooth_brain.plugin as _self_mod
-            _self_mod.ollama_pack = _ollama_mod.pack
-            _self_mod.ollama_status = _ollama_mod.get_status
-            _self_mod.is_online = _ollama_mod.is_online
-            _self_mod.refine_single_prompt = _ollama_mod.refine_single_prompt
-            _self_mod.ensure_ollama_background = _ollama_mod.ensure_ollama_background
-            _self_mod.ollama_setup_status = _ollama_mod.setup_status
+            _ollama_mod = self._reloadable_by_name["ollama"]
+            self._self_mod.__dict__.update({
+                "ollama_pack": _ollama_mod.pack,
+                "ollama_status": _ollama_mod.get_status,
+                "is_online": _ollama_mod.is_online,
+                "refine_single_prompt": _ollama_mod.refine_single_prompt,
+                "refine_single_prompt_cached": _ollama_mod.refine_single_prompt_cached,
+                "refine_batch_prompts": _ollama_mod.refine_batch_prompts,
+                "ensure_ollama_background": _ollama_mod.ensure_ollama_background,
+                "ollama_setup_status": _ollama_mod.setup_status,
+            })
+            # Guides may have changed — drop memoized refinements
+            _ollama_mod.clear_refine_cache()
         except Exception as e:
             errors.append(f"re-import: {e}")
 
@@ -2139,11 +2317,24 @@ class SmoothBrainPlugin(WAN2GPPlugin):
             "character_names": ["Character 1", "Character 2", "Character 3", "Character 4"],
             "character_images": [None, None, None, None],
             "shots": [],
+            "video_approved_count": 0,
             "shot_duration": 5.0,
             "current_step": 1,
             "project_dir": "",
         }
 
+    def _maybe_save(self, sb_state: dict, force: bool = False) -> bool:
+        """save_project, throttled to one write per _SAVE_INTERVAL_S unless forced.
+        Throttled calls schedule a trailing debounced write (superseded by the
+        next save), so the latest state still reaches disk if no forced save follows."""
+        now = time.time()
+        if not force and now - self._last_save_ts < _SAVE_INTERVAL_S:
+            save_project(sb_state, delay=_SAVE_INTERVAL_S)
+            return False
+        save_project(sb_state)
+        self._last_save_ts = now
+        return True
+
     def _get_ollama_badge(self) -> str:
         # Check live setup status first
         ss = ollama_setup_status()
@@ -4,9 +4,10 @@
 
 from __future__ import annotations
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional, Dict
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ModelPromptGuide:
     model_name: str
     syntax_rules: str
@@ -283,26 +284,36 @@ MODEL_GUIDES: Dict[str, ModelPromptGuide] = {
     "qwen_image": QWEN_IMAGE_GUIDE,
 }
 
+# Prefix-fallback order: longest key first, so the most specific family wins
+# (e.g. flux2_dev_custom → flux2_dev, not flux) and the scan stops at the first hit.
+_PREFIX_KEYS = tuple(sorted(MODEL_GUIDES, key=len, reverse=True))
 
-def get_guide(model_id: str) -> Optional[ModelPromptGuide]:
-    """Return the guide for a model id, with prefix-matching fallback."""
+
+@lru_cache(maxsize=128)
+def _match_key(model_id: str) -> Optional[str]:
+    """Registry key for a model id: exact match, else longest prefix, else None."""
     if not model_id:
         return None
     if model_id in MODEL_GUIDES:
-        return MODEL_GUIDES[model_id]
+        return model_id
     # Prefix fallback: ltx2_custom → ltx2
-    for key, guide in MODEL_GUIDES.items():
-        if model_id.startswith(key):
-            return guide
+    for key in _PREFIX_KEYS:
+        if len(key) < len(model_id) and model_id.startswith(key):
+            return key
     return None
 
 
-def format_guide_for_system_prompt(model_id: str) -> str:
-    """Return a formatted system prompt section for this model, or empty string."""
-    guide = get_guide(model_id)
-    if not guide:
-        return ""
+def get_guide(model_id: str) -> Optional[ModelPromptGuide]:
+    """Return the guide for a model id, with prefix-matching fallback."""
+    key = _match_key(model_id)
+    return MODEL_GUIDES[key] if key else None
+
 
+# Keyed by the (frozen, hashable) guide itself, so keys sharing a guide share
+# one string; each section is built on first use rather than at import.
+@lru_cache(maxsize=None)
+def _format_guide(guide: ModelPromptGuide) -> str:
+    """Assemble the system prompt section for one guide."""
     audio_section = ""
     audio_reminder = ""
     if guide.audio_guidance:
@@ -323,3 +334,9 @@ def format_guide_for_system_prompt(model_id: str) -> str:
         f"{audio_section}\n"
         f"=== END MODEL GUIDE ==={audio_reminder}"
     )
+
+
+def format_guide_for_system_prompt(model_id: str) -> str:
+    """Return a formatted system prompt section for this model, or empty string."""
+    key = _match_key(model_id)
+    return _format_guide(MODEL_GUIDES[key]) if key else ""
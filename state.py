@@ -2,14 +2,39 @@
 # Holds wizard state + per-project folder management with JSON autosave.
 
 from __future__ import annotations
+import atexit
+import contextlib
+import hashlib
 import json
 import os
 import re
 import shutil
+import threading
 import time
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, asdict, is_dataclass
+from functools import lru_cache
 from typing import List, Dict, Optional, Any, Tuple
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import ijson
+    HAS_IJSON = True
+except ImportError:
+    HAS_IJSON = False
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+from .prompt_guides import MODEL_GUIDES, LTX2_GUIDE
+
 # Legacy single-file autosave (kept for backwards compat / migration)
 AUTOSAVE_PATH = os.path.join(os.path.dirname(__file__), ".smooth_brain_session.json")
 
@@ -17,10 +42,36 @@ AUTOSAVE_PATH = os.path.join(os.path.dirname(__file__), ".smooth_brain_session.j
 _WGP_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 DEFAULT_PROJECTS_BASE = os.path.join(_WGP_ROOT, "outputs", "smooth_brain")
 
+# project.json path → digest of the last content written (saved_at excluded),
+# plus debounced writes that have not landed yet (see save_project).
+_last_saved_digest: Dict[str, bytes] = {}
+_pending_saves: Dict[str, threading.Timer] = {}
+_save_lock = threading.Lock()
+
+# Serialized projects above this size are stored as project.json.zst (if zstandard is installed)
+_ZSTD_THRESHOLD = 64 * 1024
+
+# project.json path → (mtime_ns, {saved_at, concept, step}) for list_recent_projects
+_PROJECT_META_CACHE: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+
+
+def _json_bytes(data: Any) -> bytes:
+    """Serialize to indented JSON. Uses orjson when installed (which also
+    handles dataclasses natively), else the stdlib encoder."""
+    if HAS_ORJSON:
+        return orjson.dumps(
+            data,
+            default=str,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_DATACLASS | orjson.OPT_NON_STR_KEYS,
+        )
+    if is_dataclass(data):
+        data = asdict(data)
+    return json.dumps(data, indent=2, default=str).encode("utf-8")
+
 
 # ── Data classes ──────────────────────────────────────────────────────────────
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ShotState:
     beat: str                              # Original story beat text
     image_prompt: str = ""                 # AI-refined image prompt
@@ -31,7 +82,7 @@ class ShotState:
     video_status: str = "pending"          # same values, for video phase
 
 
-@dataclass
+@dataclass(slots=True)
 class SmoothBrainSession:
     # Step 1
     concept: str = ""
@@ -72,6 +123,7 @@ def vibe_to_resolution(vibe: str) -> str:
 
 # ── Frame helpers ─────────────────────────────────────────────────────────────
 
+@lru_cache(maxsize=256)
 def snap_to_8n1(frames: int) -> int:
     """Snap frame count to nearest 8n+1 (LTX-2 requirement)."""
     if frames <= 17:
@@ -80,23 +132,34 @@ def snap_to_8n1(frames: int) -> int:
     return max(17, n * 8 + 1)
 
 
+# Slider durations are a small discrete set, so the float itself is a fine cache key
+@lru_cache(maxsize=256)
 def duration_to_frames(seconds: float, fps: int = 24, is_ltx: bool = False) -> int:
     raw = max(1, round(seconds * fps))
     return snap_to_8n1(raw) if is_ltx else raw
 
 
+# Known LTX model ids (from the prompt guide registry) resolve with one set lookup
+_LTX_IDS = frozenset(k for k, g in MODEL_GUIDES.items() if g is LTX2_GUIDE)
+
+
 def is_ltx_model(model_id: str) -> bool:
-    return model_id.lower().startswith("ltx")
+    return model_id in _LTX_IDS or model_id.lower().startswith("ltx")
 
 
 # ── Project directory management ──────────────────────────────────────────────
 
+_RE_NONALNUM = re.compile(r"[^a-z0-9\s-]")
+_RE_SPACES = re.compile(r"[\s_]+")
+_RE_HYPHENS = re.compile(r"-+")
+
+
 def slugify_concept(concept: str, max_len: int = 40) -> str:
     """Turn a concept string into a filesystem-safe slug."""
     slug = concept.lower().strip()
-    slug = re.sub(r"[^a-z0-9\s-]", "", slug)      # strip non-alnum
-    slug = re.sub(r"[\s_]+", "-", slug)             # spaces/underscores → hyphens
-    slug = re.sub(r"-+", "-", slug).strip("-")      # collapse hyphens
+    slug = _RE_NONALNUM.sub("", slug)               # strip non-alnum
+    slug = _RE_SPACES.sub("-", slug)                # spaces/underscores → hyphens
+    slug = _RE_HYPHENS.sub("-", slug).strip("-")    # collapse hyphens
     slug = slug[:max_len].rstrip("-")
     return slug or "untitled"
 
@@ -130,50 +193,162 @@ def create_project_dir(concept: str, base_dir: str = "") -> str:
     return project_dir
 
 
-def save_project(sb_state: dict, project_dir: str = "") -> None:
-    """Save sb_state dict to project.json inside the project folder."""
+def _write_project_file(path: str, payload: bytes) -> bool:
+    """Atomically replace `path` with payload. Returns True on success."""
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(payload)
+        os.replace(tmp, path)  # atomic on same filesystem
+        return True
+    except Exception as e:
+        print(f"[smooth_brain] save_project failed: {e}")
+        # Clean up temp file if it exists
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        return False
+
+
+def _store_project(path: str, payload: bytes) -> bool:
+    """Write project.json, or project.json.zst when large and zstandard is
+    available, then drop whichever of the two is now stale."""
+    if HAS_ZSTD and len(payload) > _ZSTD_THRESHOLD:
+        target, stale = path + ".zst", path
+        payload = zstandard.ZstdCompressor(level=3).compress(payload)
+    else:
+        target, stale = path, path + ".zst"
+    if not _write_project_file(target, payload):
+        return False
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(stale)
+    return True
+
+
+def _project_file(project_dir: str) -> Optional[Tuple[str, int]]:
+    """(path, mtime_ns) of the project's save file — project.json or its
+    .zst sidecar, whichever is newer — or None if there is neither."""
+    plain = os.path.join(project_dir, "project.json")
+    found = None
+    for path in (plain, plain + ".zst"):
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            continue
+        if found is None or mtime_ns > found[1]:
+            found = (path, mtime_ns)
+    return found
+
+
+@contextlib.contextmanager
+def _open_project(path: str):
+    """Binary read stream for a project save file, decompressing .zst."""
+    with open(path, "rb") as f:
+        if not path.endswith(".zst"):
+            yield f
+            return
+        if not HAS_ZSTD:
+            raise RuntimeError(f"{os.path.basename(path)} is compressed but zstandard is not installed")
+        with zstandard.ZstdDecompressor().stream_reader(f) as reader:
+            yield reader
+
+
+def _with_saved_at(body: bytes, ts: float) -> bytes:
+    """Splice a leading "saved_at" key into an indented JSON object from _json_bytes."""
+    stamp = repr(ts).encode("ascii")
+    if body == b"{}":
+        return b'{\n  "saved_at": ' + stamp + b"\n}"
+    return b'{\n  "saved_at": ' + stamp + b"," + body[1:]
+
+
+def save_project(sb_state: dict, project_dir: str = "", delay: float = 0.0) -> None:
+    """Save sb_state dict to project.json inside the project folder.
+
+    Skipped when the content (ignoring saved_at) matches what was last written,
+    so saved_at records when the project content last changed, not the last
+    save_project call — list_recent_projects sorts on it with that meaning.
+    With delay > 0 the write is debounced: it lands after `delay` seconds
+    unless a newer save_project call for the same project supersedes it.
+    The state is serialized at call time, so later mutations are not picked up.
+    """
     if not project_dir:
         project_dir = sb_state.get("project_dir", "")
     if not project_dir:
         print("[smooth_brain] save_project: no project_dir, skipping")
         return
+    path = os.path.join(project_dir, "project.json")
     try:
-        os.makedirs(project_dir, exist_ok=True)
-        data = dict(sb_state)
-        data["saved_at"] = time.time()
-        path = os.path.join(project_dir, "project.json")
-        tmp = path + ".tmp"
-        with open(tmp, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, default=str)
-        os.replace(tmp, path)  # atomic on same filesystem
+        # Serialized once: these bytes feed the digest and, if a write happens,
+        # the file itself with saved_at spliced in
+        body = _json_bytes({k: v for k, v in sb_state.items() if k != "saved_at"})
     except Exception as e:
         print(f"[smooth_brain] save_project failed: {e}")
-        # Clean up temp file if it exists
-        try:
-            tmp = os.path.join(project_dir, "project.json.tmp")
-            if os.path.exists(tmp):
-                os.remove(tmp)
-        except OSError:
-            pass
+        return
+    digest = hashlib.blake2b(body, digest_size=16).digest()
+
+    with _save_lock:
+        pending = _pending_saves.pop(path, None)
+        if pending:
+            pending.cancel()
+        if _last_saved_digest.get(path) == digest:
+            return
+        if delay <= 0:
+            os.makedirs(project_dir, exist_ok=True)
+            if _store_project(path, _with_saved_at(body, time.time())):
+                _last_saved_digest[path] = digest
+            return
+
+        def _deferred_write():
+            with _save_lock:
+                if _pending_saves.get(path) is not timer:
+                    return  # superseded or already flushed
+                del _pending_saves[path]
+                os.makedirs(project_dir, exist_ok=True)
+                if _store_project(path, _with_saved_at(body, time.time())):
+                    _last_saved_digest[path] = digest
+
+        timer = threading.Timer(delay, _deferred_write)
+        timer.daemon = True
+        _pending_saves[path] = timer
+        timer.start()
+
+
+def flush_autosave() -> None:
+    """Write every debounced project save now (e.g. on step transitions or exit)."""
+    with _save_lock:
+        timers = list(_pending_saves.values())
+    for timer in timers:
+        timer.cancel()
+        timer.function(*timer.args, **timer.kwargs)
+
+
+atexit.register(flush_autosave)
 
 
 def load_project(project_dir: str) -> Optional[dict]:
     """Load a project from its folder. Returns sb_state dict or None."""
-    path = os.path.join(project_dir, "project.json")
+    found = _project_file(project_dir)
+    if not found:
+        return None
     try:
-        if not os.path.exists(path):
-            return None
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        with _open_project(found[0]) as f:
+            if HAS_IJSON:
+                # Build the object straight from the byte stream — the raw file
+                # text is never held in memory alongside the parsed shots.
+                data = next(ijson.items(f, "", use_float=True))
+            else:
+                data = json.load(f)
         data["project_dir"] = project_dir
         return data
+    except FileNotFoundError:
+        return None
     except Exception as e:
         print(f"[smooth_brain] load_project failed: {e}")
         return None
 
 
 def list_recent_projects(base_dir: str = "", max_results: int = 10) -> List[Dict[str, Any]]:
-    """Scan for all project folders, return sorted by updated_at desc.
+    """Scan for all project folders, return sorted by saved_at desc
+    (when each project's content last changed — see save_project).
 
     Returns list of dicts: {name, path, concept, step, age_str, saved_at}
     """
@@ -183,33 +358,49 @@ def list_recent_projects(base_dir: str = "", max_results: int = 10) -> List[Dict
         return []
 
     projects = []
-    for name in os.listdir(base_dir):
-        pdir = os.path.join(base_dir, name)
-        pjson = os.path.join(pdir, "project.json")
-        if os.path.isdir(pdir) and os.path.exists(pjson):
-            try:
-                with open(pjson, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                saved_at = data.get("saved_at", 0)
-                concept = data.get("concept", name)
-                step = data.get("current_step", 1)
-                age_secs = time.time() - saved_at
-                if age_secs < 3600:
-                    age_str = f"{int(age_secs/60)}m ago"
-                elif age_secs < 86400:
-                    age_str = f"{int(age_secs/3600)}h ago"
-                else:
-                    age_str = f"{int(age_secs/86400)}d ago"
-                projects.append({
-                    "name": name,
-                    "path": pdir,
-                    "concept": concept[:60],
-                    "step": step,
-                    "age_str": age_str,
-                    "saved_at": saved_at,
-                })
-            except Exception:
-                pass
+    now = time.time()
+    with os.scandir(base_dir) as it:
+        for entry in it:
+            if not entry.is_dir():
+                continue
+            name = entry.name
+            pdir = entry.path
+            found = _project_file(pdir)
+            if not found:
+                continue
+            pjson, mtime_ns = found
+            # Only re-parse project.json files that changed since the last scan
+            cached = _PROJECT_META_CACHE.get(pjson)
+            if cached and cached[0] == mtime_ns:
+                meta = cached[1]
+            else:
+                try:
+                    with _open_project(pjson) as f:
+                        data = json.load(f)
+                    meta = {
+                        "saved_at": data.get("saved_at", 0),
+                        "concept": data.get("concept", name)[:60],
+                        "step": data.get("current_step", 1),
+                    }
+                except Exception:
+                    continue
+                _PROJECT_META_CACHE[pjson] = (mtime_ns, meta)
+            saved_at = meta["saved_at"]
+            age_secs = now - saved_at
+            if age_secs < 3600:
+                age_str = f"{int(age_secs/60)}m ago"
+            elif age_secs < 86400:
+                age_str = f"{int(age_secs/3600)}h ago"
+            else:
+                age_str = f"{int(age_secs/86400)}d ago"
+            projects.append({
+                "name": name,
+                "path": pdir,
+                "concept": meta["concept"],
+                "step": meta["step"],
+                "age_str": age_str,
+                "saved_at": saved_at,
+            })
 
     projects.sort(key=lambda p: p["saved_at"], reverse=True)
     return projects[:max_results]
@@ -236,6 +427,9 @@ def copy_to_project(src_path: str, project_dir: str, subfolder: str) -> str:
         return src_path
 
 
+_GALLERY_EXTS = (".png", ".jpg", ".jpeg", ".webp", ".mp4")
+
+
 def scan_project_gallery(project_dir: str, subfolder: str, extensions: List[str] = None) -> List[str]:
     """Return all files in a project subfolder, newest first."""
     if not project_dir:
@@ -243,51 +437,90 @@ def scan_project_gallery(project_dir: str, subfolder: str, extensions: List[str]
     folder = os.path.join(project_dir, subfolder)
     if not os.path.isdir(folder):
         return []
-    if extensions is None:
-        extensions = [".png", ".jpg", ".jpeg", ".webp", ".mp4"]
-    files = []
-    for f in os.listdir(folder):
-        if any(f.lower().endswith(ext) for ext in extensions):
-            files.append(os.path.join(folder, f))
-    files.sort(key=lambda x: os.path.getmtime(x), reverse=True)
-    return files
+    # Names are lowercased before matching, so the suffixes must be too
+    exts = tuple(e.lower() for e in extensions) if extensions is not None else _GALLERY_EXTS
+    found = []
+    with os.scandir(folder) as it:
+        for entry in it:
+            if entry.name.lower().endswith(exts):
+                try:
+                    found.append((entry.stat().st_mtime, entry.path))
+                except OSError:
+                    continue
+    found.sort(reverse=True)
+    return [path for _, path in found]
 
 
 # ── Legacy JSON autosave (kept for migration) ────────────────────────────────
 
+def _session_to_dict(s: SmoothBrainSession) -> Dict[str, Any]:
+    """Flat, hand-written asdict() for the session schema (no generic recursion)."""
+    return {
+        "concept": s.concept,
+        "shot_count": s.shot_count,
+        "genre_weights": dict(s.genre_weights),
+        "vibe": s.vibe,
+        "video_model": s.video_model,
+        "image_model": s.image_model,
+        "profile": s.profile,
+        "character_names": list(s.character_names),
+        "character_images": list(s.character_images),
+        "shots": [
+            {
+                "beat": x.beat,
+                "image_prompt": x.image_prompt,
+                "video_prompt": x.video_prompt,
+                "ref_image_path": x.ref_image_path,
+                "seed": x.seed,
+                "status": x.status,
+                "video_status": x.video_status,
+            }
+            for x in s.shots
+        ],
+        "shot_duration": s.shot_duration,
+        "current_step": s.current_step,
+        "saved_at": s.saved_at,
+        "project_dir": s.project_dir,
+    }
+
+
 def save_session(session: SmoothBrainSession) -> None:
     try:
-        data = asdict(session)
+        # Hand-written converter instead of asdict()'s generic recursion; the
+        # timestamp goes into the dict so the caller's session is left untouched
+        data = _session_to_dict(session)
         data["saved_at"] = time.time()
-        with open(AUTOSAVE_PATH, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
+        with open(AUTOSAVE_PATH, "wb") as f:
+            f.write(_json_bytes(data))
     except Exception as e:
         print(f"[smooth_brain] autosave failed: {e}")
 
 
+# Field names accepted when rehydrating the legacy autosave
+_SESSION_FIELDS = frozenset(SmoothBrainSession.__dataclass_fields__)
+_SHOT_FIELDS = frozenset(ShotState.__dataclass_fields__)
+
+
 def load_session() -> Optional[SmoothBrainSession]:
     try:
-        if not os.path.exists(AUTOSAVE_PATH):
-            return None
         with open(AUTOSAVE_PATH, "r", encoding="utf-8") as f:
             data = json.load(f)
-        session = SmoothBrainSession(**{
-            k: v for k, v in data.items()
-            if k in SmoothBrainSession.__dataclass_fields__
-        })
-        session.shots = [ShotState(**s) for s in data.get("shots", [])]
+        session = SmoothBrainSession(**{k: data[k] for k in data.keys() & _SESSION_FIELDS})
+        session.shots = [
+            ShotState(**{k: s[k] for k in s.keys() & _SHOT_FIELDS})
+            for s in data.get("shots", [])
+        ]
         return session
+    except FileNotFoundError:
+        return None
     except Exception as e:
         print(f"[smooth_brain] session load failed: {e}")
         return None
 
 
 def clear_session() -> None:
-    try:
-        if os.path.exists(AUTOSAVE_PATH):
-            os.remove(AUTOSAVE_PATH)
-    except Exception:
-        pass
+    with contextlib.suppress(OSError):
+        os.unlink(AUTOSAVE_PATH)
 
 
 def session_age_minutes(session: SmoothBrainSession) -> int:
@@ -302,8 +535,13 @@ def build_video_params(
     shot_duration: float,
     vibe: str,
     defaults: Dict[str, Any],
+    existing_paths: Optional[set] = None,
 ) -> Dict[str, Any]:
-    """Build the params dict to pass to set_model_settings for one shot."""
+    """Build the params dict to pass to set_model_settings for one shot.
+
+    `existing_paths`, when given, is a pre-checked set of ref image paths that
+    exist on disk — batch callers build it once instead of a stat per shot.
+    """
     fps = 24
     frames = duration_to_frames(shot_duration, fps, is_ltx=is_ltx_model(model_id))
     resolution = vibe_to_resolution(vibe)
@@ -317,8 +555,9 @@ def build_video_params(
         "resolution": resolution,
         "seed": shot.seed if shot.seed != -1 else -1,
     }
-    if shot.ref_image_path and os.path.exists(shot.ref_image_path):
-        params["image_start"] = shot.ref_image_path
+    ref = shot.ref_image_path
+    if ref and (ref in existing_paths if existing_paths is not None else os.path.exists(ref)):
+        params["image_start"] = ref
         params["image_prompt_type"] = "S"
 
     return params
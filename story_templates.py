@@ -5,25 +5,27 @@
 
 from __future__ import annotations
 import random
-from dataclasses import dataclass, field
-from typing import List, Dict
+from functools import lru_cache
+from itertools import accumulate
+from operator import methodcaller
+from typing import Callable, List, Dict, NamedTuple, Tuple
 
 Genre = str  # "action" | "comedy" | "drama" | "horror" | "scifi" | "romance" | "fantasy" | "thriller"
 
-ALL_GENRES: List[Genre] = [
+# Ordered — the Step 1 sliders are built and read back in this order
+ALL_GENRES: Tuple[Genre, ...] = (
     "action", "comedy", "drama", "horror", "scifi",
     "romance", "fantasy", "thriller",
-]
+)
 
 
-@dataclass
-class StoryTemplate:
+class StoryTemplate(NamedTuple):
     genre: Genre
-    beats: List[str]   # each beat is a shot description with {subject} placeholder
+    beats: Tuple[str, ...]   # each beat is a shot description with {subject} placeholder
 
 
-TEMPLATES: List[StoryTemplate] = [
-    StoryTemplate(genre="action", beats=[
+TEMPLATES: Tuple[StoryTemplate, ...] = (
+    StoryTemplate(genre="action", beats=(
         "Extreme wide shot: {subject} stands on the edge of a rooftop at sunset, city sprawling below.",
         "Low-angle shot: {subject} sprints toward camera, buildings blurring behind.",
         "Close-up: sweat on {subject}'s face, jaw clenched with determination.",
@@ -34,8 +36,8 @@ TEMPLATES: List[StoryTemplate] = [
         "Wide: an epic fight sequence unfolds in the orange dusk.",
         "Tracking shot: {subject} escapes into the crowd below, disappearing.",
         "Final wide: the city skyline quiet again, {subject} gone.",
-    ]),
-    StoryTemplate(genre="comedy", beats=[
+    )),
+    StoryTemplate(genre="comedy", beats=(
         "Wide: {subject} wakes up to find everything hilariously wrong — chaos at first glance.",
         "Reaction shot: {subject} stares at the mess with growing horror and disbelief.",
         "Montage: frantic quick cuts of {subject} attempting absurd fixes.",
@@ -46,8 +48,8 @@ TEMPLATES: List[StoryTemplate] = [
         "Wide: unexpected help arrives — making things chaotically better.",
         "Warm medium shot: laughter fills the room, the mess forgotten.",
         "Final close-up: {subject} raises an eyebrow at the camera — victorious.",
-    ]),
-    StoryTemplate(genre="drama", beats=[
+    )),
+    StoryTemplate(genre="drama", beats=(
         "Wide: {subject} alone at a window, rain streaking the glass.",
         "Close-up: a worn photograph in {subject}'s hands — a memory.",
         "Flashback medium: {subject} in better days, laughing with someone now gone.",
@@ -58,8 +60,8 @@ TEMPLATES: List[StoryTemplate] = [
         "Wide: {subject} makes a choice that cannot be undone.",
         "Tracking shot: {subject} walks away into uncertainty.",
         "Final: an empty chair, a single light left on.",
-    ]),
-    StoryTemplate(genre="horror", beats=[
+    )),
+    StoryTemplate(genre="horror", beats=(
         "Extreme wide: {subject} arrives at an isolated location as dusk falls.",
         "Medium: {subject} explores the space — something feels wrong.",
         "Close-up: {subject} finds an unsettling clue. Pause. Heartbeat.",
@@ -70,8 +72,8 @@ TEMPLATES: List[StoryTemplate] = [
         "Wide: the door opens — darkness beyond.",
         "Chaos cut: rapid flashes — screaming, running, confusion.",
         "Final frame: silence. An ominous detail left for the audience.",
-    ]),
-    StoryTemplate(genre="scifi", beats=[
+    )),
+    StoryTemplate(genre="scifi", beats=(
         "Establishing wide: a vast alien or futuristic cityscape — {subject} is tiny against it.",
         "Close-up: {subject} studies a holographic display, something anomalous.",
         "Cutaway: the anomaly spreading — a system failing.",
@@ -82,8 +84,8 @@ TEMPLATES: List[StoryTemplate] = [
         "Reaction: the countdown — three seconds.",
         "Flash cut: the solution — beauty and destruction at once.",
         "Final wide: silence returns. Stars. {subject} floats, breathing.",
-    ]),
-    StoryTemplate(genre="romance", beats=[
+    )),
+    StoryTemplate(genre="romance", beats=(
         "Wide: two strangers in the same crowded space — {subject} notices.",
         "POV: their eyes meet for just a moment, then look away.",
         "Montage: chance encounters, each a little longer than the last.",
@@ -94,8 +96,8 @@ TEMPLATES: List[StoryTemplate] = [
         "Wide: a moment of doubt — distance opens between them.",
         "Close-up: {subject} makes a choice — steps forward.",
         "Final wide: two silhouettes, together against the fading sky.",
-    ]),
-    StoryTemplate(genre="fantasy", beats=[
+    )),
+    StoryTemplate(genre="fantasy", beats=(
         "Epic wide: a mythical landscape — {subject} stands at its threshold.",
         "Close-up: an ancient artifact or mark on {subject}'s hand glows.",
         "Medium: a mysterious guide appears — a warning, a map.",
@@ -106,8 +108,8 @@ TEMPLATES: List[StoryTemplate] = [
         "Wide: the final confrontation — light against shadow.",
         "Close-up: the decisive moment — sacrifice and triumph.",
         "Final wide: the world changed forever. {subject} changed too.",
-    ]),
-    StoryTemplate(genre="thriller", beats=[
+    )),
+    StoryTemplate(genre="thriller", beats=(
         "Wide: {subject} follows someone through a crowded city — closing in.",
         "Close-up: a suspicious object discovered — face drains of color.",
         "Cutaway: a clock. A deadline. The stakes crystallize.",
@@ -118,23 +120,65 @@ TEMPLATES: List[StoryTemplate] = [
         "Over-the-shoulder: {subject} makes a dangerous call for help.",
         "Extreme close-up: a hand on a weapon. A choice. A breath.",
         "Final: silence after impact. The truth revealed at last.",
-    ]),
-]
+    )),
+)
+
+TEMPLATES_BY_GENRE: Dict[Genre, StoryTemplate] = {t.genre: t for t in TEMPLATES}
+GENRE_INDEX: Dict[Genre, int] = {t.genre: i for i, t in enumerate(TEMPLATES)}
+
+# Flat beat layout: template i owns BEATS[BEAT_OFFSETS[i]:BEAT_OFFSETS[i + 1]]
+BEATS: List[str] = [b for t in TEMPLATES for b in t.beats]
+BEAT_OFFSETS: List[int] = [0, *accumulate(len(t.beats) for t in TEMPLATES)]
+# beats pre-split on the placeholder, so filling is a join instead of a replace
+BEAT_PARTS: List[Tuple[str, ...]] = [tuple(b.split("{subject}")) for b in BEATS]
+# one compiled renderer per beat: BEAT_RENDERERS[i](s) == s.join(BEAT_PARTS[i]), all in C
+BEAT_RENDERERS: List[Callable[[str], str]] = [methodcaller("join", p) for p in BEAT_PARTS]
+
+# Renderer runs for the shot counts offered in Step 1, keyed by (template index, count)
+_PRESLICED_COUNTS = (3, 6, 10)
+_PRESLICED: Dict[Tuple[int, int], Tuple[Callable[[str], str], ...]] = {
+    (i, n): tuple(BEAT_RENDERERS[BEAT_OFFSETS[i]:BEAT_OFFSETS[i + 1]][:n])
+    for i in range(len(TEMPLATES)) for n in _PRESLICED_COUNTS
+}
 
 
 def get_weighted_templates(weights: Dict[Genre, int], count: int = 1) -> List[StoryTemplate]:
     """Return `count` templates, sampled by genre weight (0 = excluded)."""
-    pool: List[StoryTemplate] = []
-    for t in TEMPLATES:
-        w = max(0, weights.get(t.genre, 0))
-        pool.extend([t] * w)
-    if not pool:
-        pool = TEMPLATES[:]
-    random.shuffle(pool)
-    return pool[:count]
+    # Local buffer rather than a shared one — rolls can run on several Gradio threads
+    w = [0] * len(TEMPLATES)
+    for g, v in weights.items():
+        i = GENRE_INDEX.get(g)
+        if i is not None and v > 0:
+            w[i] = v
+    if not any(w):
+        # No genre selected: distinct picks straight from the list, like the old shuffle
+        if count <= len(TEMPLATES):
+            return random.sample(TEMPLATES, count)
+        return random.choices(TEMPLATES, k=count)
+    return random.choices(TEMPLATES, cum_weights=_cum_weights(tuple(w)), k=count)
+
+
+@lru_cache(maxsize=32)
+def _cum_weights(w: Tuple[int, ...]) -> Tuple[int, ...]:
+    """Cumulative weights for a slider profile."""
+    return tuple(accumulate(w))
 
 
 def fill_template(template: StoryTemplate, subject: str, shot_count: int) -> List[str]:
     """Replace {subject} in beats and trim to shot_count."""
     s = subject.strip() or "the hero"
+    idx = GENRE_INDEX.get(template.genre)
+    if idx is not None and TEMPLATES[idx] is template:
+        return list(_fill_cached(idx, s, shot_count))
     return [b.replace("{subject}", s) for b in template.beats[:shot_count]]
+
+
+@lru_cache(maxsize=512)
+def _fill_cached(idx: int, subject: str, shot_count: int) -> Tuple[str, ...]:
+    """Rendered beats for built-in template `idx` — re-rolls reuse the same subject."""
+    renderers = _PRESLICED.get((idx, shot_count))
+    if renderers is None:
+        # Cut the template's own range first, then apply shot_count exactly like
+        # beats[:shot_count] (0 → none, negative → drop from the end)
+        renderers = BEAT_RENDERERS[BEAT_OFFSETS[idx]:BEAT_OFFSETS[idx + 1]][:shot_count]
+    return tuple(r(subject) for r in renderers)
@@ -0,0 +1,18 @@
+import importlib.util
+import os
+
+import pytest
+
+# story_templates has no package-relative imports, so load it straight from
+# the plugin folder (the package __init__ pulls in the host app)
+_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "story_templates.py")
+_spec = importlib.util.spec_from_file_location("story_templates", _PATH)
+story_templates = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(story_templates)
+
+
+@pytest.mark.parametrize("template", story_templates.TEMPLATES, ids=lambda t: t.genre)
+@pytest.mark.parametrize("n", [-1, 0, 3, 10, 11])
+def test_fill_template_matches_beat_slice(template, n):
+    expected = [b.replace("{subject}", "Bob") for b in template.beats[:n]]
+    assert story_templates.fill_template(template, "Bob", n) == expected